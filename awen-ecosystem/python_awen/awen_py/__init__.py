@@ -1,3 +1,3 @@
-from .client import compute_gradients, run_ir
+from .client import compute_gradients, run_and_grad, run_ir, simulate
 
-__all__ = ["compute_gradients", "run_ir"]
+__all__ = ["compute_gradients", "run_and_grad", "run_ir", "simulate"]
@@ -0,0 +1,26 @@
+"""JSON (de)serialization for IR and result payloads.
+
+Uses `orjson` when it is installed (`pip install awen_py[fast]`) and falls back to the stdlib
+`json` module otherwise. `dumps` always returns compact UTF-8 bytes.
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
@@ -1,48 +1,356 @@
-import json
+import atexit
+import os
+import shutil
+import statistics
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
+from . import _json, daemon, native
+from .daemon import _AWENCTL
 
-def compute_gradients(ir_path: str, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1) -> Dict[str, Any]:
+# Matches the reference finite-difference provider in awen-runtime (src/gradients.rs).
+_FD_EPS = 1e-6
+_FD_DEFAULT_SEED = 0x12345678
+_FD_STRATEGIES = ("finite_difference", "finite-difference", "fd")
+
+
+def _spawn(cmd: List[str]) -> bytes:
+    """Run `cmd` to completion and return its stdout, raising CalledProcessError on failure.
+
+    Uses `os.posix_spawnp`, which does not duplicate this process's page tables the way
+    subprocess's fork+exec does; that copy gets expensive when a large PyTorch model is resident.
+    Only stdout is redirected: descriptors Python opens are non-inheritable (PEP 446), so nothing
+    else leaks into the child. Falls back to `subprocess` where posix_spawn is unavailable.
+    """
+    if not hasattr(os, "posix_spawnp"):
+        return subprocess.run(cmd, check=True, stdout=subprocess.PIPE, close_fds=False).stdout
+    r, w = os.pipe()
+    try:
+        pid = os.posix_spawnp(cmd[0], cmd, os.environ, file_actions=[(os.POSIX_SPAWN_DUP2, w, 1)])
+    except BaseException:
+        os.close(r)
+        raise
+    finally:
+        os.close(w)
+    # reap the child even if reading is interrupted (e.g. KeyboardInterrupt)
+    try:
+        with os.fdopen(r, "rb") as f:
+            data = f.read()
+    finally:
+        _, status = os.waitpid(pid, 0)
+    code = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+    if code != 0:
+        raise subprocess.CalledProcessError(code, cmd, output=data)
+    return data
+
+
+def _run_awenctl(cmd: List[str], prefix: str, kind: str, base: Optional[str] = None) -> Path:
+    """Run an awenctl command and return the artifact directory it wrote.
+
+    `--print-artifact-dir` makes awenctl print the directory as the only stdout line, so no scan of
+    `base` is needed; the newest `prefix*` directory there is only a fallback if nothing usable
+    was printed. Like awenctl, `base` defaults to `$AWEN_OUT_DIR`, then the current directory.
+    """
+    printed = _spawn(cmd + ["--print-artifact-dir"]).decode().strip()
+    if printed and os.path.isdir(printed):
+        return Path(printed)
+    candidates = list(Path(base or os.environ.get("AWEN_OUT_DIR") or Path.cwd()).glob(prefix + "*"))
+    if not candidates:
+        raise RuntimeError(f"no {kind} artifact directory found")
+    return max(candidates, key=lambda p: p.stat().st_mtime)
+
+
+def _awenctl_result(cmd: List[str]) -> Dict[str, Any]:
+    """Run an awenctl command with `--emit-stdout json` and parse the result it streams back.
+
+    Nothing is written to disk, and parsing starts as soon as awenctl has written its output.
+    """
+    return _json.loads(_spawn(cmd + ["--emit-stdout", "json"]))
+
+
+class _IRTemplate:
+    """Raw bytes of an IR file plus its parsed form and node lookups, built on first use.
+
+    `ids` maps node id -> node indices; `keys` maps a param key -> index of the first node that
+    has it (the bare-name rule of the runtime). Shared between calls: never mutate `ir`.
+    """
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+
+    @cached_property
+    def ir(self) -> Dict[str, Any]:
+        return _json.loads(self.raw)
+
+    @cached_property
+    def ids(self) -> Dict[str, List[int]]:
+        ids: Dict[str, List[int]] = {}
+        for i, node in enumerate(self.ir.get("nodes", [])):
+            ids.setdefault(node.get("id"), []).append(i)
+        return ids
+
+    @cached_property
+    def keys(self) -> Dict[str, int]:
+        keys: Dict[str, int] = {}
+        for i, node in enumerate(self.ir.get("nodes", [])):
+            for key in node.get("params", {}):
+                keys.setdefault(key, i)
+        return keys
+
+
+@lru_cache(maxsize=8)
+def _load_ir(path: str, mtime_ns: int, size: int) -> _IRTemplate:
+    return _IRTemplate(Path(path).read_bytes())
+
+
+def _ir_template(ir_path: str) -> _IRTemplate:
+    """Load `ir_path` once per (path, mtime, size); a rewritten file is picked up on the next call."""
+    path = os.path.abspath(ir_path)
+    st = os.stat(path)
+    return _load_ir(path, st.st_mtime_ns, st.st_size)
+
+
+# tmpfs when available, so the per-call overlay files never touch a block device
+_TMP_ROOT = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+
+_scratch_dirs: Dict[int, str] = {}
+
+
+def _scratch_dir() -> str:
+    """Per-process scratch directory for the per-thread overlay files, removed at exit."""
+    pid = os.getpid()
+    path = _scratch_dirs.get(pid)
+    if path is None:
+        path = _scratch_dirs[pid] = tempfile.mkdtemp(prefix="awen_", dir=_TMP_ROOT)
+        atexit.register(shutil.rmtree, path, True)
+    return path
+
+
+def _overlay_args(overlay: Optional[Dict[str, float]]) -> List[str]:
+    """Write `overlay` for awenctl and return the matching flag.
+
+    The file is overwritten in place on every call (one per thread), so repeated calls do not
+    create new files.
+    """
+    if not overlay:
+        return []
+    path = os.path.join(_scratch_dir(), f"overlay_{threading.get_ident()}.json")
+    with open(path, "wb") as f:
+        f.write(_json.dumps(overlay))
+    return ["--params-overlay", path]
+
+
+def compute_gradients(ir_path: str, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     """Call awenctl gradient and return parsed gradients.json
 
-    This helper assumes `awenctl` is on PATH (CI or runtime installation).
+    `overlay` maps "node_id:key" (or bare key) names to values applied on top of the IR at
+    `ir_path`, so callers that only change parameter values never rewrite the IR.
+
+    Uses the in-process runtime library when it can be loaded (see `awen_py.native`), then the
+    `awenctl serve` daemon when `AWEN_SOCKET` is set (see `awen_py.daemon`), and otherwise shells
+    out to `awenctl`, which must then be on PATH (CI or runtime installation).
+
+    Finite differences always use common random numbers: each sample evaluates its +eps and -eps
+    perturbations with the same seed (default `_FD_DEFAULT_SEED`), so simulator noise cancels in
+    the difference and `samples=1` is usually enough.
     """
+    if seed is None:
+        seed = _FD_DEFAULT_SEED
+    if native.available():
+        return native.gradient(_ir_template(ir_path).raw, params, strategy=strategy, seed=seed, samples=samples, overlay=overlay, crn=True)
+    client = daemon.get_client()
+    if client is not None:
+        return client.gradient(_ir_template(ir_path).raw, params, strategy=strategy, seed=seed, samples=samples, overlay=overlay, crn=True)
+
+    if strategy.lower() in _FD_STRATEGIES and len(params) * samples > 1:
+        return _parallel_finite_difference(ir_path, params, seed=seed, samples=samples, overlay=overlay)
+
     params_csv = ",".join(params)
-    cmd = ["awenctl", "gradient", ir_path, params_csv, "--strategy", strategy, "--samples", str(samples)]
+    cmd = [_AWENCTL, "gradient", ir_path, params_csv, "--strategy", strategy, "--samples", str(samples), "--seed", str(seed), "--crn"]
+    return _awenctl_result(cmd + _overlay_args(overlay))
+
+
+def run_and_grad(ir_path: str, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Evaluate the nominal cost and gradients of `params` in one runtime call.
+
+    Returns the combined result: `cost` (output power of the last node, the same scalar the
+    PyTorch bridge uses) plus the `gradients`, `gradient_std` and `provenance` fields of
+    `compute_gradients`. Backend selection and `overlay` follow `compute_gradients`; the CLI
+    fallback is a single `awenctl fused` invocation. Gradients use common random numbers as in
+    `compute_gradients`; `seed` also seeds the nominal run (runtime default 42).
+    """
+    if native.available():
+        return native.run_and_grad(_ir_template(ir_path).raw, params, strategy=strategy, seed=seed, samples=samples, overlay=overlay, crn=True)
+    client = daemon.get_client()
+    if client is not None:
+        return client.run_and_grad(_ir_template(ir_path).raw, params, strategy=strategy, seed=seed, samples=samples, overlay=overlay, crn=True)
+
+    params_csv = ",".join(params)
+    cmd = [_AWENCTL, "fused", ir_path, params_csv, "--strategy", strategy, "--samples", str(samples), "--crn"]
     if seed is not None:
         cmd += ["--seed", str(seed)]
-    subprocess.run(cmd, check=True)
+    return _awenctl_result(cmd + _overlay_args(overlay))
 
-    # find latest awen_grad_* directory
-    cwd = Path.cwd()
-    candidates = list(cwd.glob("awen_grad_*"))
-    if not candidates:
-        raise RuntimeError("no gradient artifact directory found")
-    latest = max(candidates, key=lambda p: p.stat().st_mtime)
-    grad_file = latest / "gradients.json"
-    if not grad_file.exists():
-        raise RuntimeError(f"gradients.json not found in {latest}")
-    return json.loads(grad_file.read_text())
+
+def _run_cmd(ir_path: str, seed: Optional[int]) -> List[str]:
+    cmd = [_AWENCTL, "run", ir_path]
+    if seed is not None:
+        cmd += ["--seed", str(seed)]
+    return cmd
 
 
-def run_ir(ir_path: str, seed: Optional[int] = None) -> Dict[str, Any]:
+def run_ir(ir_path: str, seed: Optional[int] = None, out_dir: Optional[str] = None, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
     """Run awenctl run and return a mapping of artifact files.
 
-    Returns a dict with paths to ir.json, results.json, trace.json, metadata.json
+    Returns a dict with paths to ir.json, results.json, scalar_cost.json, trace.json, metadata.json. `out_dir` is
+    the directory awenctl writes its artifact bundle under (default: `$AWEN_OUT_DIR`, else the
+    current directory).
+    `overlay` is passed to awenctl via `--params-overlay` (see `compute_gradients`).
     """
-    cmd = ["awenctl", "run", ir_path]
-    if seed is not None:
-        cmd += ["--seed", str(seed)]
-    subprocess.run(cmd, check=True)
-    cwd = Path.cwd()
-    candidates = list(cwd.glob("awen_run_*"))
-    if not candidates:
-        raise RuntimeError("no run artifact directory found")
-    latest = max(candidates, key=lambda p: p.stat().st_mtime)
+    cmd = _run_cmd(ir_path, seed)
+    if out_dir is not None:
+        cmd += ["--out-dir", out_dir]
+    latest = _run_awenctl(cmd + _overlay_args(overlay), "awen_run_", "run", base=out_dir)
     files = {}
-    for name in ["ir.json", "results.json", "trace.json", "metadata.json"]:
+    for name in ["ir.json", "results.json", "scalar_cost.json", "trace.json", "metadata.json"]:
         p = latest / name
         files[name] = str(p) if p.exists() else None
     return files
+
+
+def simulate(ir_path: str, seed: Optional[int] = None, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Run the IR and return the parsed SimulationResult (the contents of results.json).
+
+    Runs in-process through the runtime library or the `AWEN_SOCKET` daemon when available;
+    otherwise `awenctl run` streams the result back on stdout without writing an artifact bundle.
+    """
+    if native.available():
+        return native.run(_ir_template(ir_path).raw, seed=seed, overlay=overlay)
+    client = daemon.get_client()
+    if client is not None:
+        return client.run(_ir_template(ir_path).raw, seed=seed, overlay=overlay)
+    return _awenctl_result(_run_cmd(ir_path, seed) + _overlay_args(overlay))
+
+
+def simulate_cost(ir_path: str, seed: Optional[int] = None, overlay: Optional[Dict[str, float]] = None) -> float:
+    """Run the IR and return only its scalar cost (see `scalar_cost`).
+
+    On the CLI path `awenctl run --emit-scalar-cost` sends back the single float, so the full
+    SimulationResult is never serialized or parsed.
+    """
+    if native.available() or daemon.get_client() is not None:
+        return scalar_cost(simulate(ir_path, seed=seed, overlay=overlay))
+    return float(_awenctl_result(_run_cmd(ir_path, seed) + ["--emit-scalar-cost"] + _overlay_args(overlay)))
+
+
+def scalar_cost(results: Dict[str, Any]) -> float:
+    """Scalar cost of a SimulationResult: output power of the last node (same as the runtime).
+
+    Only the last node result is read, so the cost is O(1) in the number of nodes; an empty
+    result has cost 0.0.
+    """
+    node_results = results.get("node_results")
+    if not node_results:
+        return 0.0
+    re, im = node_results[-1].get("out_amplitude", [0.0, 0.0])
+    return float(re) * float(re) + float(im) * float(im)
+
+
+def _resolve_param(template: _IRTemplate, name: str) -> Optional[Tuple[int, str]]:
+    """Locate a parameter like the runtime providers do: "node_id:key", or the first node with `key`."""
+    if ":" in name:
+        node_id, key = name.split(":", 1)
+        indices = template.ids.get(node_id)
+        return (indices[0], key) if indices else None
+    if name in template.keys:
+        return template.keys[name], name
+    return None
+
+
+def _split_overlay(template: _IRTemplate, overlay: Optional[Dict[str, float]], loc: Tuple[int, str]) -> Tuple[Dict[str, float], float]:
+    """Split `overlay` into the entries for other parameters and the value it gives `loc`.
+
+    Follows the runtime's `apply_overlay`: a "node_id:key" entry wins over a bare name, and the IR
+    value applies when no entry targets `loc`. Entries for `loc` are left out of the returned
+    overlay, since the runtime applies entries in map order and could apply one of them over a
+    perturbed value.
+    """
+    node_idx, key = loc
+    base: Dict[str, float] = {}
+    by_node = by_name = None
+    for name, value in (overlay or {}).items():
+        if _resolve_param(template, name) != loc:
+            base[name] = value
+        elif ":" in name:
+            by_node = value
+        else:
+            by_name = value
+    for value in (by_node, by_name):
+        if value is not None:
+            return base, float(value)
+    return base, float(template.ir["nodes"][node_idx].get("params", {}).get(key, 0.0))
+
+
+# Long-lived pool for the client-side finite-difference fan-out. Each job just waits on an
+# `awenctl run` child, so threads are enough: nothing is forked from the (possibly large) caller
+# and nothing is pickled per job.
+_FD_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+_fd_executor: Optional[ThreadPoolExecutor] = None
+_fd_executor_lock = threading.Lock()
+
+
+def _get_fd_executor() -> ThreadPoolExecutor:
+    global _fd_executor
+    with _fd_executor_lock:
+        if _fd_executor is None:
+            _fd_executor = ThreadPoolExecutor(max_workers=_FD_WORKERS, thread_name_prefix="awen-fd")
+        return _fd_executor
+
+
+def _fd_sample(ir_path: str, base: Dict[str, float], name: str, orig: float, seed: int) -> float:
+    """One central-difference sample: the unchanged IR at `ir_path`, run with `base` plus `name`
+    set to `orig` +/- eps. `base` must not hold any other entry for the same parameter."""
+    perturbed = dict(base)
+    costs = []
+    for value in (orig + _FD_EPS, orig - _FD_EPS):
+        perturbed[name] = value
+        costs.append(scalar_cost(_awenctl_result(_run_cmd(ir_path, seed) + _overlay_args(perturbed))))
+    return (costs[0] - costs[1]) / (2.0 * _FD_EPS)
+
+
+def _parallel_finite_difference(ir_path: str, params: List[str], seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Central finite differences with one `awenctl run` pair per (parameter, sample), fanned out
+    over a shared thread pool.
+
+    Sample `s` of every parameter uses seed `seed + s` for both perturbations (common random
+    numbers), the same scheme as the runtime's `--crn` provider, so results match `awenctl
+    gradient --crn` and do not depend on worker scheduling. Returns the gradients.json layout.
+    """
+    template = _ir_template(ir_path)
+    seed_start = seed if seed is not None else _FD_DEFAULT_SEED
+    pool = _get_fd_executor()
+
+    gradients: Dict[str, float] = {}
+    stds: Dict[str, float] = {}
+    futures = {}
+    for name in params:
+        loc = _resolve_param(template, name)
+        if loc is not None:
+            base, orig = _split_overlay(template, overlay, loc)
+            futures[name] = [pool.submit(_fd_sample, ir_path, base, name, orig, seed_start + s) for s in range(samples)]
+    for name in params:
+        # unresolved parameters get zero gradient, as in the runtime provider
+        vals = [f.result() for f in futures.get(name, [])] or [0.0]
+        gradients[name] = sum(vals) / len(vals)
+        stds[name] = statistics.stdev(vals) if len(vals) > 1 else 0.0
+
+    return {
+        "gradients": gradients,
+        "gradient_std": stds,
+        "provenance": {"provider": "client-fd", "workers": str(_FD_WORKERS)},
+    }
@@ -0,0 +1,155 @@
+"""Client for a persistent `awenctl serve` process over a UNIX-domain socket.
+
+Set `AWEN_SOCKET=/tmp/awen.sock` to route `awen_py.client` calls through the daemon. The first
+request starts `awenctl serve $AWEN_SOCKET` if nothing is listening yet; later requests reuse the
+connection (one per thread), so each call costs a send/recv pair instead of a fork/exec of `awenctl`.
+
+Wire format (see `awen-runtime/src/serve.rs`): 4-byte big-endian length prefix on every frame;
+requests are JSON objects, replies are a status byte (0 ok, 1 error) followed by the JSON result
+or the error message.
+"""
+import atexit
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+from . import _json
+
+_LEN = struct.Struct(">I")
+# Resolved once so each launch execs the binary directly instead of searching PATH; client.py
+# imports it from here.
+_AWENCTL = shutil.which("awenctl") or "awenctl"
+
+
+class DaemonClient:
+    """Lazily connected client for one `awenctl serve` socket. Safe to share between threads.
+
+    Each thread gets its own connection (`awenctl serve` handles every connection on its own
+    thread), so a background gradient job and a cost run from another thread proceed in parallel
+    instead of queueing behind one socket.
+    """
+
+    def __init__(self, socket_path: str, connect_timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.connect_timeout = connect_timeout
+        self._local = threading.local()
+        self._socks: List[socket.socket] = []
+        self._proc: Optional[subprocess.Popen] = None
+        # guards daemon startup and `_socks`
+        self._lock = threading.Lock()
+
+    def _try_connect(self) -> Optional[socket.socket]:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            return None
+        return sock
+
+    def _start_daemon(self) -> socket.socket:
+        # Called with `_lock` held. Another thread may have started the daemon meanwhile.
+        sock = self._try_connect()
+        if sock is not None:
+            return sock
+        # Nothing listening yet: start the daemon once and wait for it to bind.
+        self._proc = subprocess.Popen(
+            [_AWENCTL, "serve", self.socket_path],
+            stdout=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        atexit.register(self.close)
+        deadline = time.monotonic() + self.connect_timeout
+        while sock is None:
+            if self._proc.poll() is not None:
+                raise RuntimeError(f"awenctl serve exited with status {self._proc.returncode}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"timed out waiting for awenctl serve on {self.socket_path}")
+            time.sleep(0.01)
+            sock = self._try_connect()
+        return sock
+
+    def _connect(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is not None and sock.fileno() != -1:
+            return sock
+        sock = self._try_connect()
+        with self._lock:
+            if sock is None:
+                sock = self._start_daemon()
+            self._socks.append(sock)
+        self._local.sock = sock
+        return sock
+
+    def _drop(self, sock: socket.socket) -> None:
+        self._local.sock = None
+        with self._lock:
+            if sock in self._socks:
+                self._socks.remove(sock)
+        sock.close()
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, n: int) -> bytes:
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = sock.recv(n - len(buf))
+            if not chunk:
+                raise RuntimeError("awenctl serve closed the connection")
+            buf += chunk
+        return bytes(buf)
+
+    def request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Send one request frame on this thread's connection and return the parsed result,
+        raising RuntimeError on failure."""
+        body = _json.dumps(payload)
+        sock = self._connect()
+        try:
+            sock.sendall(_LEN.pack(len(body)) + body)
+            (n,) = _LEN.unpack(self._recv_exact(sock, _LEN.size))
+            reply = self._recv_exact(sock, n)
+        except (OSError, RuntimeError):
+            # drop the broken connection so the next request reconnects
+            self._drop(sock)
+            raise
+        if reply[:1] != b"\x00":
+            raise RuntimeError(f"awen runtime error: {reply[1:].decode('utf-8', 'replace')}")
+        return _json.loads(memoryview(reply)[1:])
+
+    def run(self, ir_bytes: bytes, seed: Optional[int] = None, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        return self.request({"op": "run", "ir": ir_bytes.decode(), "overlay": overlay, "seed": seed})
+
+    def gradient(self, ir_bytes: bytes, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None, crn: bool = False) -> Dict[str, Any]:
+        return self.request({"op": "gradient", "ir": ir_bytes.decode(), "overlay": overlay, "params": params, "strategy": strategy, "seed": seed, "samples": samples, "crn": crn})
+
+    def run_and_grad(self, ir_bytes: bytes, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None, crn: bool = False) -> Dict[str, Any]:
+        return self.request({"op": "run_and_grad", "ir": ir_bytes.decode(), "overlay": overlay, "params": params, "strategy": strategy, "seed": seed, "samples": samples, "crn": crn})
+
+    def close(self) -> None:
+        """Close every thread's connection and stop the daemon if this client started it."""
+        with self._lock:
+            socks, self._socks = self._socks, []
+        for sock in socks:
+            sock.close()
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.terminate()
+            self._proc.wait()
+        self._proc = None
+
+
+_clients: Dict[str, DaemonClient] = {}
+
+
+def get_client() -> Optional[DaemonClient]:
+    """Return the shared client for `AWEN_SOCKET`, or None when the variable is unset."""
+    path = os.environ.get("AWEN_SOCKET")
+    if not path:
+        return None
+    client = _clients.get(path)
+    if client is None:
+        client = _clients[path] = DaemonClient(path)
+    return client
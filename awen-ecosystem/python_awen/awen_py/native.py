@@ -0,0 +1,121 @@
+"""ctypes bindings to the in-process AWEN runtime library.
+
+`cargo build --release` in `awen-runtime` produces `libawen_runtime.so` (`.dylib` on macOS,
+`awen_runtime.dll` on Windows) exposing the C ABI from `src/ffi.rs`. Set `AWEN_LIB` to its path
+or place it on the dynamic loader path. When the library cannot be loaded, `awen_py.client`
+falls back to invoking the `awenctl` CLI.
+"""
+import ctypes
+import ctypes.util
+import os
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
+
+from . import _json
+
+_LIB_NAME = "awen_runtime"
+
+
+@lru_cache(maxsize=None)
+def load_library() -> Optional[ctypes.CDLL]:
+    """Load and cache the runtime shared library, or return None if it is not available."""
+    candidates = []
+    if os.environ.get("AWEN_LIB"):
+        candidates.append(os.environ["AWEN_LIB"])
+    found = ctypes.util.find_library(_LIB_NAME)
+    if found:
+        candidates.append(found)
+    candidates.append(f"lib{_LIB_NAME}.so")
+
+    for path in candidates:
+        try:
+            lib = ctypes.CDLL(path)
+        except OSError:
+            continue
+        _declare(lib)
+        return lib
+    return None
+
+
+def available() -> bool:
+    return load_library() is not None
+
+
+def _declare(lib: ctypes.CDLL) -> None:
+    out_args = [ctypes.POINTER(ctypes.POINTER(ctypes.c_uint8)), ctypes.POINTER(ctypes.c_size_t)]
+    lib.awen_run.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_char_p, ctypes.c_size_t, ctypes.c_uint64, ctypes.c_int] + out_args
+    lib.awen_run.restype = ctypes.c_int
+    gradient_args = [
+        ctypes.c_char_p, ctypes.c_size_t,
+        ctypes.c_char_p, ctypes.c_size_t,
+        ctypes.c_char_p, ctypes.c_size_t,
+        ctypes.c_char_p, ctypes.c_size_t,
+        ctypes.c_uint64, ctypes.c_int, ctypes.c_uint32, ctypes.c_int,
+    ] + out_args
+    for fn in (lib.awen_gradient, lib.awen_run_and_grad):
+        fn.argtypes = gradient_args
+        fn.restype = ctypes.c_int
+    lib.awen_free.argtypes = [ctypes.POINTER(ctypes.c_uint8), ctypes.c_size_t]
+    lib.awen_free.restype = None
+
+
+def _call(fn, *args) -> bytes:
+    """Invoke an `awen_*` entry point and copy its output buffer before freeing it."""
+    out_ptr = ctypes.POINTER(ctypes.c_uint8)()
+    out_len = ctypes.c_size_t(0)
+    code = fn(*args, ctypes.byref(out_ptr), ctypes.byref(out_len))
+    try:
+        data = ctypes.string_at(out_ptr, out_len.value)
+    finally:
+        load_library().awen_free(out_ptr, out_len)
+    if code != 0:
+        raise RuntimeError(f"awen runtime error: {data.decode('utf-8', 'replace')}")
+    return data
+
+
+def _overlay_bytes(overlay: Optional[Dict[str, float]]) -> bytes:
+    return _json.dumps(overlay) if overlay else b""
+
+
+def run(ir_bytes: bytes, seed: Optional[int] = None, overlay: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Simulate the IR in-process and return the parsed SimulationResult (results.json contents).
+
+    `overlay` maps "node_id:key" (or bare key) names to values applied on top of the IR.
+    """
+    lib = load_library()
+    if lib is None:
+        raise RuntimeError("AWEN runtime library not available")
+    overlay_b = _overlay_bytes(overlay)
+    data = _call(lib.awen_run, ir_bytes, len(ir_bytes), overlay_b, len(overlay_b), seed or 0, int(seed is not None))
+    return _json.loads(data)
+
+
+def _gradient_call(fn_name: str, ir_bytes: bytes, params: List[str], strategy: str, seed: Optional[int], samples: int, overlay: Optional[Dict[str, float]], crn: bool) -> Dict[str, Any]:
+    lib = load_library()
+    if lib is None:
+        raise RuntimeError("AWEN runtime library not available")
+    overlay_b = _overlay_bytes(overlay)
+    params_csv = ",".join(params).encode()
+    strategy_b = strategy.encode()
+    data = _call(
+        getattr(lib, fn_name),
+        ir_bytes, len(ir_bytes),
+        overlay_b, len(overlay_b),
+        params_csv, len(params_csv),
+        strategy_b, len(strategy_b),
+        seed or 0, int(seed is not None), samples, int(crn),
+    )
+    return _json.loads(data)
+
+
+def gradient(ir_bytes: bytes, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None, crn: bool = False) -> Dict[str, Any]:
+    """Compute gradients in-process and return the parsed GradientResult (gradients.json contents).
+
+    `crn` seeds both finite-difference perturbations identically (common random numbers).
+    """
+    return _gradient_call("awen_gradient", ir_bytes, params, strategy, seed, samples, overlay, crn)
+
+
+def run_and_grad(ir_bytes: bytes, params: List[str], strategy: str = "finite_difference", seed: Optional[int] = None, samples: int = 1, overlay: Optional[Dict[str, float]] = None, crn: bool = False) -> Dict[str, Any]:
+    """Evaluate the nominal cost and gradients in one call; returns `cost` plus the GradientResult fields."""
+    return _gradient_call("awen_run_and_grad", ir_bytes, params, strategy, seed, samples, overlay, crn)
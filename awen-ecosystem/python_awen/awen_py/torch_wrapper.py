@@ -3,17 +3,60 @@ try:
 except Exception:
     torch = None
 
-from typing import List, Optional
-from .client import compute_gradients, run_ir
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from .client import compute_gradients, simulate_cost
+
+# Background gradient jobs started by forward; the work runs in awenctl or the runtime library,
+# so a couple of threads are enough to overlap it with the caller.
+_grad_executor: Optional[ThreadPoolExecutor] = None
+_grad_executor_lock = threading.Lock()
+
+
+def _submit_gradients(ir_path: str, param_names: List[str], seed: Optional[int], overlay: Dict[str, float]) -> Future:
+    global _grad_executor
+    with _grad_executor_lock:
+        if _grad_executor is None:
+            _grad_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='awen-grad')
+    return _grad_executor.submit(compute_gradients, ir_path, param_names, strategy='finite_difference', seed=seed, samples=1, overlay=overlay)
+
 
+class _AwenCtx:
+    """State forward hands to backward. `__slots__` keeps it to one small allocation per step
+    (`dataclass(slots=True)` needs Python 3.10)."""
 
-class AWENAutogradFunction:
-    """A thin autograd connector that uses `awenctl run` for forward (returns scalar cost)
-    and `awenctl gradient` for backward. This is a convenience bridge for PyTorch-based
-    experiments. It shells out to `awenctl`, so ensure the runtime is installed and on PATH.
+    __slots__ = ('ir_path', 'overlay', 'param_names', 'seed', 'pending')
+
+    def __init__(self, ir_path: str, overlay: Dict[str, float], param_names: List[str], seed: Optional[int], pending: Optional[Future]):
+        self.ir_path = ir_path
+        self.overlay = overlay
+        self.param_names = param_names
+        self.seed = seed
+        self.pending = pending
+
+
+# Subclass torch.autograd.Function when PyTorch is installed; the module stays importable without it.
+_FunctionBase = torch.autograd.Function if torch is not None else object
+
+
+class AWENAutogradFunction(_FunctionBase):
+    """A thin autograd connector that uses `client.simulate_cost` for forward (returns scalar
+    cost) and `client.compute_gradients` for backward. When `params_tensor` requires grad and grad mode was
+    enabled at the call (`grad_enabled`; forward itself always runs with grad disabled), forward
+    starts the gradient job in the background before computing the cost, so it runs while the
+    caller continues towards `.backward()`, which then only waits for it.
+    This is a convenience bridge for PyTorch-based experiments. Both calls use the client's
+    backend selection: the runtime library when it loads, then the `AWEN_SOCKET` daemon, then the
+    `awenctl` CLI on PATH.
 
     Usage pattern (high-level):
-        # ir.json contains placeholders for parameter values which we overwrite per-call
+        # ir_template.json holds default parameter values which are overlaid per-call
         params_tensor = torch.tensor([0.1, 0.2], requires_grad=True)
         cost = awen_forward('ir_template.json', ['mzi_0:phase','mzi_1:phase'], params_tensor)
         cost.backward()
@@ -21,133 +64,60 @@ class AWENAutogradFunction:
     """
 
     @staticmethod
-    def forward(ir_template_path: str, param_names: List[str], params_tensor, seed: Optional[int] = None):
-        if torch is None:
-            raise RuntimeError("PyTorch is required for AWEN autograd wrapper")
-
-        # Write a temporary IR with parameters substituted. We assume the IR nodes have params we can update by name.
-        import json, tempfile, os
-
-        ir = None
-        with open(ir_template_path, 'r') as f:
-            ir = json.load(f)
-
+    def forward(ctx, params_tensor, ir_template_path: str, param_names: List[str], seed: Optional[int] = None, grad_enabled: bool = False):
         # Map tensor values (1D) to parameter names in order
-        vals = params_tensor.detach().cpu().numpy().tolist()
+        vals = params_tensor.detach().cpu().tolist() if params_tensor.is_cuda else params_tensor.detach().tolist()
         if len(vals) != len(param_names):
             raise ValueError("param_names length must match params_tensor length")
 
-        # Apply params: support names like 'node_id:param' or global search
-        for name, v in zip(param_names, vals):
-            if ':' in name:
-                node_id, pkey = name.split(':', 1)
-                for node in ir.get('nodes', []):
-                    if node.get('id') == node_id:
-                        node.setdefault('params', {})[pkey] = float(v)
-            else:
-                # search first matching param key in nodes
-                applied = False
-                for node in ir.get('nodes', []):
-                    if 'params' in node and name in node['params']:
-                        node['params'][name] = float(v)
-                        applied = True
-                        break
-                if not applied:
-                    # as fallback, write to metadata
-                    ir.setdefault('metadata', {})[name] = str(v)
-
-        tmpdir = tempfile.mkdtemp(prefix='awen_autograd_')
-        tmp_ir = os.path.join(tmpdir, 'ir.json')
-        with open(tmp_ir, 'w') as f:
-            json.dump(ir, f, indent=2)
-
-        # Run the IR to produce a scalar cost (runtime-defined; we read results.json last node power)
-        run_res = run_ir(tmp_ir, seed=seed)
-        results_json = run_res.get('results.json')
-        if results_json is None:
-            raise RuntimeError('run did not produce results.json')
-
-        with open(results_json, 'r') as f:
-            results = json.load(f)
-
-        # Extract scalar cost: expect SimulationResult with node_results and out_amplitude
-        scalar = 0.0
-        node_results = results.get('node_results')
-        if node_results and len(node_results) > 0:
-            last = node_results[-1]
-            re, im = last.get('out_amplitude', [0.0, 0.0])
-            scalar = float(re) * float(re) + float(im) * float(im)
-        else:
-            # fallback: sum analog measurements
-            for n in results.get('node_results', []):
-                m = n.get('measurement')
-                if m and m.get('analog_value') is not None:
-                    scalar += float(m.get('analog_value'))
-
-        out = torch.tensor([scalar], dtype=params_tensor.dtype, device=params_tensor.device)
-        out.requires_grad = True
-
-        # Save context for backward: temp_ir path and param names
-        ctx = {
-            'tmp_ir': tmp_ir,
-            'param_names': param_names,
-            'seed': seed,
-        }
-        return out, ctx
+        # Pass the values as a parameter overlay on top of the unchanged IR template instead of
+        # rewriting the IR; names are 'node_id:param' or a bare param key (see client.compute_gradients)
+        overlay = {name: float(v) for name, v in zip(param_names, vals)}
 
-    @staticmethod
-    def backward(ctx_obj, grad_output):
-        # ctx_obj is the dict returned by forward
-        import json, os
+        # When gradients are needed, the backward job uses the same IR and overlay: start it now so
+        # it overlaps the cost run below and whatever the caller does before backward. Under
+        # torch.no_grad() (evaluation) backward never runs, so no job is started.
+        pending = None
+        if grad_enabled and ctx.needs_input_grad[0]:
+            pending = _submit_gradients(ir_template_path, param_names, seed, overlay)
 
-        tmp_ir = ctx_obj.get('tmp_ir')
-        param_names = ctx_obj.get('param_names')
-        seed = ctx_obj.get('seed')
+        # Run the IR to produce a scalar cost (runtime-defined: the last node power)
+        scalar = simulate_cost(ir_template_path, seed=seed, overlay=overlay)
 
-        # Call compute_gradients helper which invokes awenctl gradient
-        grad_res = compute_gradients(tmp_ir, param_names, strategy='finite_difference', seed=seed, samples=1)
+        # Save context for backward: IR template path, overlay, param names and the gradient job
+        ctx.awen = _AwenCtx(ir_template_path, overlay, param_names, seed, pending)
+        return params_tensor.new_full((1,), scalar)
 
+    @staticmethod
+    def backward(ctx, grad_output):
+        saved = ctx.awen
+        param_names = saved.param_names
+
+        # Wait for the gradient job forward started; otherwise compute the gradients now
+        if saved.pending is not None:
+            grad_res = saved.pending.result()
+        else:
+            grad_res = compute_gradients(saved.ir_path, param_names, strategy='finite_difference', seed=saved.seed, samples=1, overlay=saved.overlay)
         # parse gradients.json format: expect gradients mapping
         grads_map = grad_res.get('gradients', {})
-        # create gradient tensor corresponding to param_names
-        import torch
-        grads = [float(grads_map.get(n, 0.0)) for n in param_names]
-        grad_tensor = torch.tensor(grads, dtype=grad_output.dtype, device=grad_output.device)
+        # create gradient tensor corresponding to param_names, filled straight from the mapping
+        if np is not None:
+            arr = np.fromiter((grads_map.get(n, 0.0) for n in param_names), dtype=np.float64, count=len(param_names))
+            grad_tensor = torch.from_numpy(arr).to(device=grad_output.device, dtype=grad_output.dtype)
+        else:
+            grad_tensor = torch.tensor([float(grads_map.get(n, 0.0)) for n in param_names], dtype=grad_output.dtype, device=grad_output.device)
 
-        # Multiply by upstream grad (scalar)
-        if grad_output is not None:
-            grad_tensor = grad_tensor * grad_output.view(-1)[0]
+        # Multiply by upstream grad (scalar) in place
+        grad_tensor.mul_(grad_output.detach().flatten()[0].item())
 
-        # Return None for ir_template_path and param_names, and gradient tensor for params
-        return None, None, grad_tensor
+        # Gradient for params_tensor; None for ir_template_path, param_names, seed and grad_enabled
+        return grad_tensor, None, None, None, None
 
 
 def awen_forward(ir_template_path: str, param_names: List[str], params_tensor, seed: Optional[int] = None):
-    """Convenience wrapper that integrates with PyTorch autograd when available.
-
-    Returns a scalar torch tensor (1-element).
+    """Differentiable AWEN cost: returns a 1-element tensor whose `.backward()` fills
+    `params_tensor.grad` through `AWENAutogradFunction`.
     """
     if torch is None:
         raise RuntimeError('PyTorch is required for awen_forward')
-
-    out, ctx = AWENAutogradFunction.forward(ir_template_path, param_names, params_tensor, seed=seed)
-    # Attach backward context by wrapping in a custom object exposing backward
-    class _TensorWithCtx(torch.Tensor):
-        pass
-
-    # We cannot easily manufacture a subclassed tensor in pure python without extending C API.
-    # Instead, we return `out` and let users call a manual `awen_backward` helper if needed.
-    # Provide the context for manual backward call:
-    out._awen_ctx = ctx
-    return out
-
-
-def awen_backward(out_tensor):
-    """Manual backward helper: calls compute_gradients using the saved context and applies gradients to parameters.
-    This is intended as a thin fallback when integrating with pure Python workflows.
-    """
-    if not hasattr(out_tensor, '_awen_ctx'):
-        raise RuntimeError('no AWEN context attached to tensor')
-    ctx = out_tensor._awen_ctx
-    grads = AWENAutogradFunction.backward(ctx, torch.tensor([1.0]))
-    return grads
+    return AWENAutogradFunction.apply(params_tensor, ir_template_path, param_names, seed, torch.is_grad_enabled())
@@ -4,8 +4,7 @@ This script demonstrates using the `awen_py` helpers to run an IR and compute gr
 `awenctl` runtime. It is a thin integration demo; for production use native bindings or RPC.
 """
 import torch
-from awen_py import compute_gradients, run_ir
-from awen_py.torch_wrapper import awen_forward, awen_backward
+from awen_py.torch_wrapper import awen_forward
 
 
 def main():
@@ -15,15 +14,15 @@ def main():
     # initial params
     params = torch.tensor([0.1, 0.2], dtype=torch.float64, requires_grad=True)
 
-    # Run forward (shells out to awenctl run)
+    # Run forward (returns the cost; the gradient job keeps running in the background)
     print("Running forward...")
     out = awen_forward(ir_path, param_names, params, seed=42)
     print("Scalar cost:", out.item())
 
-    # Compute gradients by calling awenctl gradient (manual backward)
-    print("Computing gradients via awenctl gradient...")
-    grads = awen_backward(out)
-    print("Gradients:", grads)
+    # Regular autograd backward waits for the gradient job and fills params.grad
+    print("Running backward...")
+    out.backward()
+    print("Gradients:", params.grad)
 
 
 if __name__ == "__main__":
@@ -1,15 +1,26 @@
 import os
+import shutil
 import sys
 import json
 
+import pytest
+
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from awen_py.client import compute_gradients, run_ir
+from awen_py import native
+from awen_py.client import _AWENCTL, _IRTemplate, _awenctl_result, _overlay_args, _parallel_finite_difference, _split_overlay, compute_gradients, run_and_grad, run_ir, scalar_cost, simulate, simulate_cost
+
+# The example IR shipped with the runtime crate
+EXAMPLE_IR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'awen-runtime', 'example_ir.json'))
 
+requires_awenctl = pytest.mark.skipif(shutil.which('awenctl') is None, reason='awenctl not on PATH')
+requires_runtime = pytest.mark.skipif(shutil.which('awenctl') is None and not native.available(), reason='neither awenctl nor the runtime library is available')
 
+
+@requires_awenctl
 def test_run_and_gradient_smoke():
-    # This is a smoke test that assumes `awenctl` is available in PATH in the test environment.
-    ir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'example_ir.json'))
+    # Smoke test: run_ir always goes through the `awenctl` CLI.
+    ir = EXAMPLE_IR
     # run
     files = run_ir(ir, seed=42)
     assert files.get('results.json') is not None
@@ -17,3 +28,63 @@ def test_run_and_gradient_smoke():
     # gradient
     res = compute_gradients(ir, ['mzi_0:phase', 'mzi_1:phase'], seed=42, samples=1)
     assert 'gradients' in res
+
+
+@requires_runtime
+def test_simulate_returns_results():
+    ir = EXAMPLE_IR
+    results = simulate(ir, seed=42)
+    assert results['run_seed'] == 42
+    assert len(results['node_results']) > 0
+
+
+@requires_runtime
+def test_run_and_grad_returns_cost_and_gradients():
+    ir = EXAMPLE_IR
+    res = run_and_grad(ir, ['mzi_0:phase', 'mzi_1:phase'], seed=42, samples=1)
+    assert isinstance(res['cost'], float)
+    assert set(res['gradients']) == {'mzi_0:phase', 'mzi_1:phase'}
+
+
+@requires_runtime
+def test_simulate_applies_overlay():
+    ir = EXAMPLE_IR
+    base = simulate(ir, seed=42)
+    shifted = simulate(ir, seed=42, overlay={'mzi_0:phase': 1.0})
+    assert base['node_results'] != shifted['node_results']
+
+
+@requires_runtime
+def test_simulate_cost_matches_full_results():
+    ir = EXAMPLE_IR
+    assert simulate_cost(ir, seed=42) == scalar_cost(simulate(ir, seed=42))
+
+
+def test_split_overlay_matches_runtime_rules():
+    # Same rules as `apply_overlay` in awen-runtime/src/ir/mod.rs; no runtime needed
+    with open(EXAMPLE_IR, 'rb') as f:
+        template = _IRTemplate(f.read())
+    overlay = {'mzi_1:phase': 0.7, 'mzi_0:loss': 0.05, 'phase': 0.3, 'gain': 2.0}
+
+    # a bare name targets the first node that has the key
+    assert _split_overlay(template, overlay, (0, 'phase')) == ({'mzi_1:phase': 0.7, 'mzi_0:loss': 0.05, 'gain': 2.0}, 0.3)
+    assert _split_overlay(template, overlay, (1, 'phase')) == ({'mzi_0:loss': 0.05, 'phase': 0.3, 'gain': 2.0}, 0.7)
+    # "node_id:key" may add a key the node does not have yet
+    assert _split_overlay(template, overlay, (0, 'loss'))[1] == 0.05
+    # "node_id:key" wins over a bare name for the same parameter
+    assert _split_overlay(template, {'mzi_0:phase': 0.9, 'phase': 0.3}, (0, 'phase')) == ({}, 0.9)
+    # without an entry the IR value applies
+    assert _split_overlay(template, None, (1, 'phase')) == ({}, 0.2)
+
+
+@requires_awenctl
+def test_parallel_finite_difference_matches_runtime_crn():
+    # The client-side fan-out must use the runtime's CRN seeds (`seed + s`) for every parameter
+    params = ['mzi_0:phase', 'mzi_1:phase']
+    overlay = {'mzi_0:phase': 0.4}
+    ours = _parallel_finite_difference(EXAMPLE_IR, params, seed=7, samples=3, overlay=overlay)
+    cmd = [_AWENCTL, 'gradient', EXAMPLE_IR, ','.join(params), '--strategy', 'finite_difference', '--samples', '3', '--seed', '7', '--crn']
+    ref = _awenctl_result(cmd + _overlay_args(overlay))
+    for name in params:
+        assert ours['gradients'][name] == pytest.approx(ref['gradients'][name], rel=1e-6, abs=1e-9)
+        assert ours['gradient_std'][name] == pytest.approx(ref['gradient_std'][name], rel=1e-6, abs=1e-9)
@@ -0,0 +1,78 @@
+import os
+import shutil
+import socket
+import struct
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from awen_py.daemon import DaemonClient
+
+
+@pytest.mark.skipif(shutil.which('awenctl') is None, reason='awenctl not on PATH')
+def test_daemon_serves_run_and_gradient(tmp_path):
+    # Smoke test: the client starts `awenctl serve` itself, so `awenctl` must be on PATH.
+    ir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'awen-runtime', 'example_ir.json'))
+    with open(ir, 'rb') as f:
+        ir_bytes = f.read()
+
+    client = DaemonClient(str(tmp_path / 'awen.sock'))
+    try:
+        results = client.run(ir_bytes, seed=42)
+        assert results['run_seed'] == 42
+
+        res = client.gradient(ir_bytes, ['mzi_0:phase', 'mzi_1:phase'], seed=42)
+        assert 'gradients' in res
+    finally:
+        client.close()
+
+
+def _slow_server(path, delay):
+    # Stand-in for `awenctl serve`: one thread per connection, every request answered after `delay`
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+
+    def handle(conn):
+        with conn:
+            while True:
+                header = conn.recv(4, socket.MSG_WAITALL)
+                if len(header) < 4:
+                    return
+                conn.recv(struct.unpack('>I', header)[0], socket.MSG_WAITALL)
+                time.sleep(delay)
+                reply = b'\x00{}'
+                conn.sendall(struct.pack('>I', len(reply)) + reply)
+
+    def accept():
+        while True:
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return listener
+
+
+def test_requests_from_different_threads_overlap(tmp_path):
+    # A background gradient job must not serialize forward's cost run behind it
+    path = str(tmp_path / 'awen.sock')
+    listener = _slow_server(path, 0.5)
+    client = DaemonClient(path)
+    try:
+        start = time.monotonic()
+        threads = [threading.Thread(target=client.run, args=(b'{}',)) for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert time.monotonic() - start < 0.9
+    finally:
+        client.close()
+        listener.close()
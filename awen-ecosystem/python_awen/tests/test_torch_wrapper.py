@@ -0,0 +1,48 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+torch = pytest.importorskip('torch')
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from awen_py import native, torch_wrapper
+from awen_py.client import compute_gradients
+from awen_py.torch_wrapper import AWENAutogradFunction, awen_forward
+
+EXAMPLE_IR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'awen-runtime', 'example_ir.json'))
+PARAMS = ['mzi_0:phase', 'mzi_1:phase']
+
+pytestmark = pytest.mark.skipif(shutil.which('awenctl') is None and not native.available(), reason='neither awenctl nor the runtime library is available')
+
+
+def _expected_grad(values):
+    res = compute_gradients(EXAMPLE_IR, PARAMS, strategy='finite_difference', seed=42, samples=1, overlay=dict(zip(PARAMS, values)))
+    return torch.tensor([res['gradients'][n] for n in PARAMS], dtype=torch.float64)
+
+
+def test_backward_uses_gradient_job_started_in_forward():
+    params = torch.tensor([0.1, 0.2], dtype=torch.float64, requires_grad=True)
+    out = awen_forward(EXAMPLE_IR, PARAMS, params, seed=42)
+    assert out.grad_fn.awen.pending is not None
+    out.backward()
+    assert torch.allclose(params.grad, _expected_grad([0.1, 0.2]))
+
+
+def test_backward_computes_gradients_without_pending_job():
+    params = torch.tensor([0.3, 0.4], dtype=torch.float64, requires_grad=True)
+    out = AWENAutogradFunction.apply(params, EXAMPLE_IR, PARAMS, 42, False)
+    assert out.grad_fn.awen.pending is None
+    out.backward()
+    assert torch.allclose(params.grad, _expected_grad([0.3, 0.4]))
+
+
+def test_no_gradient_job_under_no_grad(monkeypatch):
+    submitted = []
+    monkeypatch.setattr(torch_wrapper, '_submit_gradients', lambda *args: submitted.append(args))
+    params = torch.tensor([0.1, 0.2], dtype=torch.float64, requires_grad=True)
+    with torch.no_grad():
+        awen_forward(EXAMPLE_IR, PARAMS, params, seed=42)
+    assert submitted == []
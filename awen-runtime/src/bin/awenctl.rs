@@ -4,15 +4,80 @@ use awen_runtime::gradients;
 use awen_runtime::gradients::{GradientOptions, NoiseModel};
 use awen_runtime::ir;
 use clap::Parser;
-use std::path::PathBuf;
+use std::io::Write;
+use std::path::{Path, PathBuf};
+use std::sync::atomic::{AtomicBool, Ordering};
 use uuid::Uuid;
 
+/// Set by `--print-artifact-dir` / `--emit-stdout`: stdout carries only the artifact directory
+/// or the result, so progress messages go to stderr instead.
+static STDOUT_IS_DATA: AtomicBool = AtomicBool::new(false);
+
+macro_rules! status {
+    ($($arg:tt)*) => {
+        if STDOUT_IS_DATA.load(Ordering::Relaxed) {
+            eprintln!($($arg)*)
+        } else {
+            println!($($arg)*)
+        }
+    };
+}
+
 #[derive(Parser)]
 struct Args {
+    /// Print the artifact bundle directory as the only line on stdout (run, gradient, fused)
+    #[clap(long, global = true)]
+    print_artifact_dir: bool,
+    /// Write the result (results.json / gradients.json contents) to stdout instead of an
+    /// artifact bundle (run, gradient, fused)
+    #[clap(long, global = true, value_enum)]
+    emit_stdout: Option<EmitFormat>,
     #[clap(subcommand)]
     command: Command,
 }
 
+#[derive(Clone, Copy, clap::ValueEnum)]
+enum EmitFormat {
+    /// Compact JSON on a single line
+    Json,
+}
+
+/// Where a command delivers its result: an artifact bundle under `out_dir`, or stdout.
+struct Output<'a> {
+    out_dir: Option<&'a Path>,
+    emit: Option<EmitFormat>,
+}
+
+impl Output<'_> {
+    /// Print `value` to stdout when `--emit-stdout` is set. Returns false if the caller should
+    /// write its artifact bundle instead.
+    fn emit<T: serde::Serialize>(&self, value: &T) -> Result<bool> {
+        match self.emit {
+            Some(EmitFormat::Json) => {
+                let mut stdout = std::io::stdout().lock();
+                serde_json::to_writer(&mut stdout, value)?;
+                writeln!(stdout)?;
+                Ok(true)
+            }
+            None => Ok(false),
+        }
+    }
+
+    /// Directory artifact bundles are written under: `--out-dir` if given, else `$AWEN_OUT_DIR`
+    /// (e.g. a tmpfs path such as /dev/shm/awen), else the current directory.
+    fn base(&self) -> Result<PathBuf> {
+        let dir = match self.out_dir {
+            Some(dir) => dir.to_path_buf(),
+            None => match std::env::var_os("AWEN_OUT_DIR") {
+                Some(dir) if !dir.is_empty() => PathBuf::from(dir),
+                _ => return Ok(std::env::current_dir()?),
+            },
+        };
+        std::fs::create_dir_all(&dir)?;
+        Ok(dir)
+    }
+}
+
 #[derive(clap::Subcommand)]
 enum Command {
     Run {
@@ -21,6 +86,17 @@ enum Command {
         /// Optional RNG seed for deterministic replay
         #[clap(long)]
         seed: Option<u64>,
+        /// With --emit-stdout, emit only the scalar cost (output power of the last node) instead
+        /// of the full results; the artifact bundle always carries it as scalar_cost.json
+        #[clap(long)]
+        emit_scalar_cost: bool,
+        /// JSON file of parameter values applied on top of the IR, e.g. {"mzi_0:phase": 0.1}
+        #[clap(long)]
+        params_overlay: Option<String>,
+        /// Directory to write the artifact bundle under (default: $AWEN_OUT_DIR, else the current
+        /// directory)
+        #[clap(long)]
+        out_dir: Option<PathBuf>,
     },
     Gradient {
         /// Path to IR JSON file
@@ -36,81 +112,189 @@ enum Command {
         /// Samples for stochastic estimators
         #[clap(long, default_value_t = 1u32)]
         samples: u32,
+        /// Common random numbers: seed the +eps and -eps finite-difference runs identically
+        #[clap(long)]
+        crn: bool,
+        /// JSON file of parameter values applied on top of the IR, e.g. {"mzi_0:phase": 0.1}
+        #[clap(long)]
+        params_overlay: Option<String>,
+        /// Directory to write the artifact bundle under (default: $AWEN_OUT_DIR, else the current
+        /// directory)
+        #[clap(long)]
+        out_dir: Option<PathBuf>,
+    },
+    /// Serve run/gradient requests over a UNIX-domain socket until killed
+    Serve {
+        /// Socket path to bind, e.g. /tmp/awen.sock
+        socket: PathBuf,
+    },
+    /// Nominal run plus gradients in one invocation; writes a combined results.json
+    Fused {
+        /// Path to IR JSON file
+        ir: String,
+        /// Comma-separated parameter list, e.g. "mzi_0:phase,mzi_1:phase"
+        params: String,
+        /// Gradient strategy
+        #[clap(long, default_value = "finite_difference")]
+        strategy: String,
+        /// RNG seed
+        #[clap(long)]
+        seed: Option<u64>,
+        /// Samples for stochastic estimators
+        #[clap(long, default_value_t = 1u32)]
+        samples: u32,
+        /// Common random numbers: seed the +eps and -eps finite-difference runs identically
+        #[clap(long)]
+        crn: bool,
+        /// JSON file of parameter values applied on top of the IR, e.g. {"mzi_0:phase": 0.1}
+        #[clap(long)]
+        params_overlay: Option<String>,
+        /// Directory to write the artifact bundle under (default: $AWEN_OUT_DIR, else the current
+        /// directory)
+        #[clap(long)]
+        out_dir: Option<PathBuf>,
     },
 }
 
 fn main() -> Result<()> {
     let args = Args::parse();
-    match args.command {
-        Command::Run { ir, seed } => run_command(&ir, seed)?,
+    STDOUT_IS_DATA.store(
+        args.print_artifact_dir || args.emit_stdout.is_some(),
+        Ordering::Relaxed,
+    );
+    let emit = args.emit_stdout;
+    let artifact_dir = match args.command {
+        Command::Run {
+            ir,
+            seed,
+            emit_scalar_cost,
+            params_overlay,
+            out_dir,
+        } => run_command(
+            &ir,
+            seed,
+            emit_scalar_cost,
+            params_overlay.as_deref(),
+            Output {
+                out_dir: out_dir.as_deref(),
+                emit,
+            },
+        )?,
         Command::Gradient {
             ir,
             params,
             strategy,
             seed,
             samples,
-        } => gradient_command(&ir, &params, &strategy, seed, samples)?,
+            crn,
+            params_overlay,
+            out_dir,
+        } => gradient_command(
+            &ir,
+            params_overlay.as_deref(),
+            &params,
+            GradientOptions {
+                strategy,
+                seed,
+                samples: Some(samples),
+                crn,
+            },
+            Output {
+                out_dir: out_dir.as_deref(),
+                emit,
+            },
+        )?,
+        Command::Fused {
+            ir,
+            params,
+            strategy,
+            seed,
+            samples,
+            crn,
+            params_overlay,
+            out_dir,
+        } => fused_command(
+            &ir,
+            params_overlay.as_deref(),
+            &params,
+            GradientOptions {
+                strategy,
+                seed,
+                samples: Some(samples),
+                crn,
+            },
+            Output {
+                out_dir: out_dir.as_deref(),
+                emit,
+            },
+        )?,
+        Command::Serve { socket } => {
+            println!("awenctl: serving on {}", socket.display());
+            awen_runtime::serve::serve(&socket)?;
+            None
+        }
+    };
+    if let (true, Some(dir)) = (args.print_artifact_dir, artifact_dir) {
+        println!("{}", dir.display());
     }
     Ok(())
 }
 
-fn run_command(ir_path: &str, seed: Option<u64>) -> Result<()> {
-    println!("awenctl: running IR {} (seed={:?})", ir_path, seed);
-    let graph = ir::load_from_json(ir_path).map_err(|e| anyhow::anyhow!(e))?;
+/// Read an IR file as JSON text, applying the optional `--params-overlay` file on top.
+fn read_ir_json(ir_path: &str, overlay_path: Option<&str>) -> Result<String> {
+    let ir_json = std::fs::read_to_string(ir_path)?;
+    match overlay_path {
+        None => Ok(ir_json),
+        Some(p) => {
+            let overlay = ir::load_overlay(p).map_err(|e| anyhow::anyhow!(e))?;
+            let merged =
+                ir::overlay_json(&ir_json, Some(&overlay)).map_err(|e| anyhow::anyhow!(e))?;
+            Ok(merged.into_owned())
+        }
+    }
+}
+
+fn run_command(
+    ir_path: &str,
+    seed: Option<u64>,
+    emit_scalar_cost: bool,
+    overlay_path: Option<&str>,
+    output: Output,
+) -> Result<Option<PathBuf>> {
+    status!("awenctl: running IR {} (seed={:?})", ir_path, seed);
+    let graph = ir::load_with_overlay(ir_path, overlay_path).map_err(|e| anyhow::anyhow!(e))?;
     let engine = Engine::new();
-    let out_dir = engine.run_graph(&graph, seed)?;
-    println!("Run complete. Artifacts written to: {}", out_dir.display());
-    Ok(())
+    if output.emit.is_some() {
+        // no artifact bundle: only the simulation result (or just its cost) is needed
+        let sim = engine.simulate(&graph, seed)?;
+        if emit_scalar_cost {
+            output.emit(&sim.scalar_cost())?;
+        } else {
+            output.emit(&sim)?;
+        }
+        return Ok(None);
+    }
+    let out_dir = engine.run_graph_in(&graph, seed, &output.base()?)?;
+    status!("Run complete. Artifacts written to: {}", out_dir.display());
+    Ok(Some(out_dir))
 }
 
 fn gradient_command(
     ir_path: &str,
+    overlay_path: Option<&str>,
     params_csv: &str,
-    strategy: &str,
-    seed: Option<u64>,
-    samples: u32,
-) -> Result<()> {
-    println!(
+    opts: GradientOptions,
+    output: Output,
+) -> Result<Option<PathBuf>> {
+    status!(
         "awenctl: computing gradients for {} (strategy={}, seed={:?})",
-        ir_path, strategy, seed
+        ir_path,
+        opts.strategy,
+        opts.seed
     );
-    let ir_json = std::fs::read_to_string(ir_path)?;
-
-    // Register defaults into the global registry and pick the reference provider
-    gradients::register_defaults_to_global();
-    // Provider selection logic:
-    // - if strategy == "adjoint" -> prefer adjoint provider
-    // - if strategy == "finite_difference" -> use fd
-    // - if strategy == "auto" -> prefer adjoint if supported, else fd
-    let provider: std::sync::Arc<dyn gradients::GradientProvider> = match strategy {
-        s if s.eq_ignore_ascii_case("adjoint") => gradients::GLOBAL_GRADIENT_REGISTRY
-            .get("reference-adjoint")
-            .ok_or_else(|| anyhow::anyhow!("adjoint provider not available"))?,
-        s if s.eq_ignore_ascii_case("finite_difference")
-            || s.eq_ignore_ascii_case("finite-difference")
-            || s.eq_ignore_ascii_case("fd") =>
-        {
-            gradients::GLOBAL_GRADIENT_REGISTRY
-                .get("reference-fd")
-                .ok_or_else(|| anyhow::anyhow!("fd provider not available"))?
-        }
-        _ => {
-            // auto
-            if let Some(adj) = gradients::GLOBAL_GRADIENT_REGISTRY.get("reference-adjoint") {
-                adj
-            } else if let Some(fd) = gradients::GLOBAL_GRADIENT_REGISTRY.get("reference-fd") {
-                fd
-            } else {
-                return Err(anyhow::anyhow!("no gradient providers registered"));
-            }
-        }
-    };
-
-    let params: Vec<String> = params_csv
-        .split(',')
-        .map(|s| s.trim().to_string())
-        .filter(|s| !s.is_empty())
-        .collect();
+    let ir_json = read_ir_json(ir_path, overlay_path)?;
+    let provider = gradients::select_provider(&opts.strategy)?;
+    let params = gradients::parse_param_list(params_csv);
 
     let noise = NoiseModel {
         shot_noise_std: None,
@@ -119,17 +303,14 @@ fn gradient_command(
         loss_variation: None,
         metadata: None,
     };
-    let opts = GradientOptions {
-        strategy: strategy.to_string(),
-        seed,
-        samples: Some(samples),
-    };
-
     let res = provider.compute_gradients(&ir_json, &params, &noise, &opts)?;
+    if output.emit(&res)? {
+        return Ok(None);
+    }
 
     // write artifact
     let run_id = Uuid::new_v4().to_string();
-    let out_dir: PathBuf = std::env::current_dir()?.join(format!("awen_grad_{}", run_id));
+    let out_dir: PathBuf = output.base()?.join(format!("awen_grad_{}", run_id));
     std::fs::create_dir_all(&out_dir)?;
     let out_path = out_dir.join("gradients.json");
     std::fs::write(&out_path, serde_json::to_string_pretty(&res)?)?;
@@ -142,6 +323,50 @@ fn gradient_command(
     awen_runtime::observability::write_timeline(&out_dir, &events)?;
     awen_runtime::observability::write_metrics(&out_dir, &metrics)?;
 
-    println!("Gradients written to: {}", out_path.display());
-    Ok(())
+    status!("Gradients written to: {}", out_path.display());
+    Ok(Some(out_dir))
+}
+
+fn fused_command(
+    ir_path: &str,
+    overlay_path: Option<&str>,
+    params_csv: &str,
+    opts: GradientOptions,
+    output: Output,
+) -> Result<Option<PathBuf>> {
+    status!(
+        "awenctl: fused run+gradient for {} (strategy={}, seed={:?})",
+        ir_path,
+        opts.strategy,
+        opts.seed
+    );
+    let ir_json = read_ir_json(ir_path, overlay_path)?;
+    let provider = gradients::select_provider(&opts.strategy)?;
+    let params = gradients::parse_param_list(params_csv);
+    let res = gradients::run_and_grad(
+        provider.as_ref(),
+        &ir_json,
+        &params,
+        &NoiseModel::default(),
+        &opts,
+    )?;
+    if output.emit(&res)? {
+        return Ok(None);
+    }
+
+    let run_id = Uuid::new_v4().to_string();
+    let out_dir: PathBuf = output.base()?.join(format!("awen_fused_{}", run_id));
+    std::fs::create_dir_all(&out_dir)?;
+    let out_path = out_dir.join("results.json");
+    std::fs::write(&out_path, serde_json::to_string_pretty(&res)?)?;
+
+    let node_ids = vec!["fused_op".to_string()];
+    let (spans, events, metrics) =
+        awen_runtime::observability::build_basic_observability(&run_id, &node_ids, opts.seed);
+    awen_runtime::observability::write_traces(&out_dir, &spans)?;
+    awen_runtime::observability::write_timeline(&out_dir, &events)?;
+    awen_runtime::observability::write_metrics(&out_dir, &metrics)?;
+
+    status!("Cost and gradients written to: {}", out_path.display());
+    Ok(Some(out_dir))
 }
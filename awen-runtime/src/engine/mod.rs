@@ -3,31 +3,195 @@
 use crate::hal::{self, LabDevice};
 use crate::ir::Graph;
 use crate::observability;
+use crate::plugins::reference_sim::SimulationResult;
 use crate::plugins::run_reference_simulator;
 use crate::state::{
-    CoherenceManager, QuantumMode, QuantumState, ReferenceCoherenceManager, ReferenceStateEvolver,
-    StateEvolver,
+    CoherenceManager, CoherenceWindow, MeasurementOutcome, QuantumMode, QuantumState,
+    ReferenceCoherenceManager, ReferenceStateEvolver, StateEvolver,
 };
 use anyhow::Result;
 use chrono::Utc;
 use std::collections::HashMap;
-use std::path::PathBuf;
+use std::path::{Path, PathBuf};
 use uuid::Uuid;
 
 pub struct Engine {}
 
+/// Quantum-state side of a run, persisted by `run_graph_in`.
+struct QuantumRun {
+    coherence_window: CoherenceWindow,
+    state_history: Vec<QuantumState>,
+    measurement_outcomes: HashMap<String, MeasurementOutcome>,
+}
+
 impl Engine {
     pub fn new() -> Self {
         Self {}
     }
 
+    /// Validate and simulate the graph without writing an artifact bundle. Returns the same
+    /// `SimulationResult` that `run_graph` persists as `results.json`, after the same coherence
+    /// and DETECTOR measurement checks, so a graph `run_graph` rejects fails here too.
+    pub fn simulate(&self, graph: &Graph, seed: Option<u64>) -> Result<SimulationResult> {
+        crate::ir::validate_graph(graph).map_err(|e| anyhow::anyhow!(e))?;
+        let run_seed = seed.unwrap_or(42);
+        let sim = run_reference_simulator(graph, Some(run_seed))?;
+        self.execute_quantum(graph, run_seed)?;
+        Ok(sim)
+    }
+
     /// Run the provided IR graph, optionally with a seed for deterministic replay.
     pub fn run_graph(&self, graph: &Graph, seed: Option<u64>) -> Result<PathBuf> {
+        self.run_graph_in(graph, seed, &std::env::current_dir()?)
+    }
+
+    /// Like `run_graph`, but writes the `awen_run_<id>` artifact bundle under `base` instead of
+    /// the current directory.
+    pub fn run_graph_in(&self, graph: &Graph, seed: Option<u64>, base: &Path) -> Result<PathBuf> {
         // Validate IR: check conditional branches reference valid nodes
         crate::ir::validate_graph(graph).map_err(|e| anyhow::anyhow!(e))?;
 
         let run_seed = seed.unwrap_or(42);
 
+        // Run reference simulator for classical simulation
+        let sim = run_reference_simulator(graph, Some(run_seed))?;
+
+        // Quantum-state evolution: checks coherence per node and performs DETECTOR measurements
+        let QuantumRun {
+            coherence_window,
+            state_history,
+            measurement_outcomes,
+        } = self.execute_quantum(graph, run_seed)?;
+
+        // Create artifact bundle directory
+        let run_id = Uuid::new_v4().to_string();
+        let out_dir = base.join(format!("awen_run_{}", run_id));
+        std::fs::create_dir_all(&out_dir)?;
+
+        // Save IR
+        let ir_path = out_dir.join("ir.json");
+        let ir_data = serde_json::to_string_pretty(graph)?;
+        std::fs::write(&ir_path, ir_data)?;
+
+        // Save simulation results
+        let results_path = out_dir.join("results.json");
+        let results_data = serde_json::to_string_pretty(&sim)?;
+        std::fs::write(&results_path, results_data)?;
+
+        // Save the scalar cost on its own so callers need not parse results.json for it
+        let cost_path = out_dir.join("scalar_cost.json");
+        std::fs::write(&cost_path, serde_json::to_string(&sim.scalar_cost())?)?;
+
+        // Save quantum state history (new artifact)
+        let state_history_path = out_dir.join("quantum_states.json");
+        let state_history_data = serde_json::to_string_pretty(&state_history)?;
+        std::fs::write(&state_history_path, state_history_data)?;
+
+        // Save measurement outcomes (new artifact)
+        let measurements_path = out_dir.join("measurements.json");
+        let measurements_data = serde_json::to_string_pretty(&measurement_outcomes)?;
+        std::fs::write(&measurements_path, measurements_data)?;
+
+        // Save a simple trace (reuse results for now)
+        let trace_path = out_dir.join("trace.json");
+        std::fs::write(&trace_path, serde_json::to_string_pretty(&sim)?)?;
+
+        // Build and write basic observability artifacts (traces.jsonl, timeline.json, metrics.json)
+        // Create simple node id list
+        let node_ids: Vec<String> = graph.nodes.iter().map(|n| n.id.clone()).collect();
+        let (spans, events, metrics) =
+            observability::build_basic_observability(&run_id, &node_ids, Some(run_seed));
+        observability::write_traces(&out_dir, &spans)?;
+        observability::write_timeline(&out_dir, &events)?;
+        observability::write_metrics(&out_dir, &metrics)?;
+
+        // More structured spans/events: IR validate, scheduling, per-node execution and measurement
+        let mut extra_spans: Vec<observability::Span> = Vec::new();
+        let mut extra_events: Vec<observability::TimelineEvent> = Vec::new();
+
+        // IR validate span
+        extra_spans.push(observability::Span {
+            id: format!("{}-ir-validate", run_id),
+            parent: None,
+            name: "ir_validate".to_string(),
+            start_iso: Utc::now().to_rfc3339(),
+            end_iso: Utc::now().to_rfc3339(),
+            attributes: HashMap::new(),
+        });
+        // scheduling span
+        extra_spans.push(observability::Span {
+            id: format!("{}-schedule", run_id),
+            parent: None,
+            name: "scheduling".to_string(),
+            start_iso: Utc::now().to_rfc3339(),
+            end_iso: Utc::now().to_rfc3339(),
+            attributes: HashMap::new(),
+        });
+
+        // coherence window span
+        let mut coh_attrs = HashMap::new();
+        coh_attrs.insert(
+            "coherence_start_ns".to_string(),
+            coherence_window.start_ns.to_string(),
+        );
+        coh_attrs.insert(
+            "coherence_end_ns".to_string(),
+            coherence_window.end_ns.to_string(),
+        );
+        extra_spans.push(observability::Span {
+            id: format!("{}-coherence", run_id),
+            parent: None,
+            name: "coherence_window".to_string(),
+            start_iso: Utc::now().to_rfc3339(),
+            end_iso: Utc::now().to_rfc3339(),
+            attributes: coh_attrs,
+        });
+
+        for nr in &sim.node_results {
+            let mut attrs = HashMap::new();
+            attrs.insert("node_id".to_string(), nr.node_id.clone());
+            attrs.insert("phase_noise".to_string(), format!("{}", nr.phase_noise));
+            let span = observability::Span {
+                id: format!("{}-node-{}", run_id, nr.node_id),
+                parent: None,
+                name: format!("exec:{}", nr.node_id),
+                start_iso: Utc::now().to_rfc3339(),
+                end_iso: Utc::now().to_rfc3339(),
+                attributes: attrs.clone(),
+            };
+            extra_spans.push(span);
+
+            let ev = observability::TimelineEvent {
+                lane: "kernel".to_string(),
+                name: format!("exec:{}", nr.node_id),
+                start_ms: Utc::now().timestamp_millis() as u128,
+                end_ms: (Utc::now().timestamp_millis() + 1) as u128,
+                attributes: attrs,
+            };
+            extra_events.push(ev);
+        }
+
+        // merge previous and extra
+        let mut all_spans = spans.clone();
+        all_spans.extend(extra_spans);
+        let mut all_events = events.clone();
+        all_events.extend(extra_events);
+
+        // rewrite observability artifacts including detailed spans/events
+        observability::write_traces(&out_dir, &all_spans)?;
+        observability::write_timeline(&out_dir, &all_events)?;
+        observability::write_metrics(&out_dir, &metrics)?;
+
+        // TODO: Phase 2.6.2 - Build and persist ArtifactBundle with full provenance
+        // save_artifact(&bundle, &artifacts_dir)?;
+
+        Ok(out_dir)
+    }
+
+    /// Evolve the quantum state through the graph: validates coherence before every node and
+    /// performs DETECTOR measurements (following their conditional branches). Shared by
+    /// `run_graph_in` and `simulate`, so both accept and reject the same graphs.
+    fn execute_quantum(&self, graph: &Graph, run_seed: u64) -> Result<QuantumRun> {
         // Initialize coherence window and quantum state evolver for quantum-capable graphs
         let coherence_mgr = ReferenceCoherenceManager;
         let state_evolver = ReferenceStateEvolver;
@@ -65,11 +229,7 @@ impl Engine {
 
         // Track quantum state evolution through simulation
         let mut state_history: Vec<QuantumState> = vec![quantum_state.clone()];
-        let mut measurement_outcomes: HashMap<String, crate::state::MeasurementOutcome> =
-            HashMap::new();
-
-        // Run reference simulator for classical simulation
-        let sim = run_reference_simulator(graph, Some(run_seed))?;
+        let mut measurement_outcomes: HashMap<String, MeasurementOutcome> = HashMap::new();
 
         // Simulate quantum gate operations on each node (demonstration)
         // Build a set of nodes to execute, starting with root nodes
@@ -167,125 +327,11 @@ impl Engine {
             }
         }
 
-        // Create artifact bundle directory
-        let run_id = Uuid::new_v4().to_string();
-        let out_dir = std::env::current_dir()?.join(format!("awen_run_{}", run_id));
-        std::fs::create_dir_all(&out_dir)?;
-
-        // Save IR
-        let ir_path = out_dir.join("ir.json");
-        let ir_data = serde_json::to_string_pretty(graph)?;
-        std::fs::write(&ir_path, ir_data)?;
-
-        // Save simulation results
-        let results_path = out_dir.join("results.json");
-        let results_data = serde_json::to_string_pretty(&sim)?;
-        std::fs::write(&results_path, results_data)?;
-
-        // Save quantum state history (new artifact)
-        let state_history_path = out_dir.join("quantum_states.json");
-        let state_history_data = serde_json::to_string_pretty(&state_history)?;
-        std::fs::write(&state_history_path, state_history_data)?;
-
-        // Save measurement outcomes (new artifact)
-        let measurements_path = out_dir.join("measurements.json");
-        let measurements_data = serde_json::to_string_pretty(&measurement_outcomes)?;
-        std::fs::write(&measurements_path, measurements_data)?;
-
-        // Save a simple trace (reuse results for now)
-        let trace_path = out_dir.join("trace.json");
-        std::fs::write(&trace_path, serde_json::to_string_pretty(&sim)?)?;
-
-        // Build and write basic observability artifacts (traces.jsonl, timeline.json, metrics.json)
-        // Create simple node id list
-        let node_ids: Vec<String> = graph.nodes.iter().map(|n| n.id.clone()).collect();
-        let (spans, events, metrics) =
-            observability::build_basic_observability(&run_id, &node_ids, Some(run_seed));
-        observability::write_traces(&out_dir, &spans)?;
-        observability::write_timeline(&out_dir, &events)?;
-        observability::write_metrics(&out_dir, &metrics)?;
-
-        // More structured spans/events: IR validate, scheduling, per-node execution and measurement
-        let mut extra_spans: Vec<observability::Span> = Vec::new();
-        let mut extra_events: Vec<observability::TimelineEvent> = Vec::new();
-
-        // IR validate span
-        extra_spans.push(observability::Span {
-            id: format!("{}-ir-validate", run_id),
-            parent: None,
-            name: "ir_validate".to_string(),
-            start_iso: Utc::now().to_rfc3339(),
-            end_iso: Utc::now().to_rfc3339(),
-            attributes: HashMap::new(),
-        });
-        // scheduling span
-        extra_spans.push(observability::Span {
-            id: format!("{}-schedule", run_id),
-            parent: None,
-            name: "scheduling".to_string(),
-            start_iso: Utc::now().to_rfc3339(),
-            end_iso: Utc::now().to_rfc3339(),
-            attributes: HashMap::new(),
-        });
-
-        // coherence window span
-        let mut coh_attrs = HashMap::new();
-        coh_attrs.insert(
-            "coherence_start_ns".to_string(),
-            coherence_window.start_ns.to_string(),
-        );
-        coh_attrs.insert(
-            "coherence_end_ns".to_string(),
-            coherence_window.end_ns.to_string(),
-        );
-        extra_spans.push(observability::Span {
-            id: format!("{}-coherence", run_id),
-            parent: None,
-            name: "coherence_window".to_string(),
-            start_iso: Utc::now().to_rfc3339(),
-            end_iso: Utc::now().to_rfc3339(),
-            attributes: coh_attrs,
-        });
-
-        for nr in &sim.node_results {
-            let mut attrs = HashMap::new();
-            attrs.insert("node_id".to_string(), nr.node_id.clone());
-            attrs.insert("phase_noise".to_string(), format!("{}", nr.phase_noise));
-            let span = observability::Span {
-                id: format!("{}-node-{}", run_id, nr.node_id),
-                parent: None,
-                name: format!("exec:{}", nr.node_id),
-                start_iso: Utc::now().to_rfc3339(),
-                end_iso: Utc::now().to_rfc3339(),
-                attributes: attrs.clone(),
-            };
-            extra_spans.push(span);
-
-            let ev = observability::TimelineEvent {
-                lane: "kernel".to_string(),
-                name: format!("exec:{}", nr.node_id),
-                start_ms: Utc::now().timestamp_millis() as u128,
-                end_ms: (Utc::now().timestamp_millis() + 1) as u128,
-                attributes: attrs,
-            };
-            extra_events.push(ev);
-        }
-
-        // merge previous and extra
-        let mut all_spans = spans.clone();
-        all_spans.extend(extra_spans);
-        let mut all_events = events.clone();
-        all_events.extend(extra_events);
-
-        // rewrite observability artifacts including detailed spans/events
-        observability::write_traces(&out_dir, &all_spans)?;
-        observability::write_timeline(&out_dir, &all_events)?;
-        observability::write_metrics(&out_dir, &metrics)?;
-
-        // TODO: Phase 2.6.2 - Build and persist ArtifactBundle with full provenance
-        // save_artifact(&bundle, &artifacts_dir)?;
-
-        Ok(out_dir)
+        Ok(QuantumRun {
+            coherence_window,
+            state_history,
+            measurement_outcomes,
+        })
     }
 
     /// Apply a calibration mapping through the HAL, enforcing safety limits if provided.
@@ -328,12 +374,28 @@ mod tests {
         assert!(out.exists(), "output directory does not exist");
         assert!(out.join("results.json").exists(), "results.json missing");
         assert!(out.join("ir.json").exists(), "ir.json missing");
+        assert!(
+            out.join("scalar_cost.json").exists(),
+            "scalar_cost.json missing"
+        );
         // Observability artifacts
         assert!(out.join("traces.jsonl").exists(), "traces.jsonl missing");
         assert!(out.join("timeline.json").exists(), "timeline.json missing");
         assert!(out.join("metrics.json").exists(), "metrics.json missing");
     }
 
+    #[test]
+    fn test_run_graph_in_writes_under_base() {
+        let graph = ir::load_from_json("example_ir.json").expect("failed to load example_ir.json");
+        let base = std::env::temp_dir().join(format!("awen_test_{}", Uuid::new_v4()));
+        let out = Engine::new()
+            .run_graph_in(&graph, Some(42), &base)
+            .expect("engine run failed");
+        assert_eq!(out.parent(), Some(base.as_path()));
+        assert!(out.join("results.json").exists(), "results.json missing");
+        std::fs::remove_dir_all(&base).ok();
+    }
+
     #[test]
     fn test_timeline_contains_kernel_events() {
         let graph = ir::load_from_json("example_ir.json").expect("failed to load example_ir.json");
@@ -422,6 +484,35 @@ mod tests {
         // Measurements may be empty if no DETECTOR nodes in graph, which is fine
     }
 
+    #[test]
+    fn test_simulate_runs_the_same_checks_as_run_graph() {
+        // DETECTOR nodes only measure when they carry params; "mode_9" does not exist
+        for measure_mode in [None, Some("mode_9")] {
+            let graph = ir::Graph {
+                nodes: vec![ir::Node {
+                    id: "d0".to_string(),
+                    node_type: "DETECTOR".to_string(),
+                    params: [("efficiency".to_string(), 0.9)].into_iter().collect(),
+                    measure_mode: measure_mode.map(|m| m.to_string()),
+                    conditional_branches: None,
+                }],
+                edges: vec![],
+                metadata: Default::default(),
+            };
+            let base = std::env::temp_dir().join(format!("awen_test_{}", Uuid::new_v4()));
+            let engine = Engine::new();
+            let simulated = engine.simulate(&graph, Some(42));
+            let ran = engine.run_graph_in(&graph, Some(42), &base);
+            assert_eq!(
+                simulated.is_ok(),
+                ran.is_ok(),
+                "measure_mode {:?}",
+                measure_mode
+            );
+            std::fs::remove_dir_all(&base).ok();
+        }
+    }
+
     #[test]
     fn test_ir_validation_fails_on_invalid_branches() {
         let graph = ir::Graph {
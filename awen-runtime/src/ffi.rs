@@ -0,0 +1,342 @@
+//! C ABI for in-process callers (the `awen_py` ctypes bindings).
+//!
+//! Entry points take the IR as a UTF-8 JSON byte buffer, plus an optional parameter overlay
+//! (`{"node_id:key": value}` JSON, empty for none), and hand back a heap-allocated
+//! JSON document through `out_ptr`/`out_len`, avoiding the `awenctl` process spawn and the
+//! artifact round-trip through the filesystem. The return code is 0 on success; on failure
+//! the output buffer holds the error message instead; panics are caught at the boundary and
+//! reported the same way, so they never unwind into (and abort) the host process. Output
+//! buffers must be released with `awen_free`.
+
+use crate::engine::Engine;
+use crate::gradients::{self, GradientOptions, NoiseModel};
+use crate::ir;
+use anyhow::Result;
+use std::os::raw::c_int;
+use std::panic::{self, AssertUnwindSafe};
+
+pub(crate) fn run_json(
+    ir_json: &str,
+    overlay: Option<&ir::ParamOverlay>,
+    seed: Option<u64>,
+) -> Result<Vec<u8>> {
+    let mut graph: ir::Graph = serde_json::from_str(ir_json)?;
+    if let Some(overlay) = overlay {
+        ir::apply_overlay(&mut graph, overlay);
+    }
+    let sim = Engine::new().simulate(&graph, seed)?;
+    Ok(serde_json::to_vec(&sim)?)
+}
+
+pub(crate) fn gradient_json(
+    ir_json: &str,
+    overlay: Option<&ir::ParamOverlay>,
+    params_csv: &str,
+    opts: &GradientOptions,
+) -> Result<Vec<u8>> {
+    let ir_json = ir::overlay_json(ir_json, overlay).map_err(|e| anyhow::anyhow!(e))?;
+    let provider = gradients::select_provider(&opts.strategy)?;
+    let params = gradients::parse_param_list(params_csv);
+    let res = provider.compute_gradients(&ir_json, &params, &NoiseModel::default(), opts)?;
+    Ok(serde_json::to_vec(&res)?)
+}
+
+pub(crate) fn run_and_grad_json(
+    ir_json: &str,
+    overlay: Option<&ir::ParamOverlay>,
+    params_csv: &str,
+    opts: &GradientOptions,
+) -> Result<Vec<u8>> {
+    let ir_json = ir::overlay_json(ir_json, overlay).map_err(|e| anyhow::anyhow!(e))?;
+    let provider = gradients::select_provider(&opts.strategy)?;
+    let params = gradients::parse_param_list(params_csv);
+    let res = gradients::run_and_grad(
+        provider.as_ref(),
+        &ir_json,
+        &params,
+        &NoiseModel::default(),
+        opts,
+    )?;
+    Ok(serde_json::to_vec(&res)?)
+}
+
+/// Parse an optional `{"node_id:key": value}` overlay; an empty buffer means no overlay.
+fn parse_overlay(overlay_json: &str) -> Result<Option<ir::ParamOverlay>> {
+    if overlay_json.trim().is_empty() {
+        return Ok(None);
+    }
+    Ok(Some(serde_json::from_str(overlay_json)?))
+}
+
+/// Borrow a caller-owned byte buffer as `&str`.
+///
+/// # Safety
+/// `ptr` must be valid for reads of `len` bytes for the duration of the call.
+unsafe fn borrow_str<'a>(ptr: *const u8, len: usize) -> Result<&'a str> {
+    if ptr.is_null() {
+        return Ok("");
+    }
+    Ok(std::str::from_utf8(std::slice::from_raw_parts(ptr, len))?)
+}
+
+/// Move `res` (or its error message) into a leaked buffer owned by the caller.
+///
+/// # Safety
+/// `out_ptr` and `out_len` must be valid for writes.
+unsafe fn emit(res: Result<Vec<u8>>, out_ptr: *mut *mut u8, out_len: *mut usize) -> c_int {
+    let (code, bytes) = match res {
+        Ok(bytes) => (0, bytes),
+        Err(e) => (1, e.to_string().into_bytes()),
+    };
+    let boxed = bytes.into_boxed_slice();
+    *out_len = boxed.len();
+    *out_ptr = Box::into_raw(boxed) as *mut u8;
+    code
+}
+
+/// Run an entry point body, turning a panic into an error so it does not unwind across
+/// `extern "C"`.
+fn catch_panic<F: FnOnce() -> Result<Vec<u8>>>(f: F) -> Result<Vec<u8>> {
+    panic::catch_unwind(AssertUnwindSafe(f)).unwrap_or_else(|payload| {
+        let msg = payload
+            .downcast_ref::<&str>()
+            .map(|s| s.to_string())
+            .or_else(|| payload.downcast_ref::<String>().cloned())
+            .unwrap_or_else(|| "unknown panic".to_string());
+        Err(anyhow::anyhow!("awen runtime panicked: {}", msg))
+    })
+}
+
+fn opt_seed(seed: u64, has_seed: c_int) -> Option<u64> {
+    if has_seed != 0 {
+        Some(seed)
+    } else {
+        None
+    }
+}
+
+fn gradient_opts(
+    strategy: &str,
+    seed: u64,
+    has_seed: c_int,
+    samples: u32,
+    crn: c_int,
+) -> GradientOptions {
+    GradientOptions {
+        strategy: strategy.to_string(),
+        seed: opt_seed(seed, has_seed),
+        samples: Some(samples),
+        crn: crn != 0,
+    }
+}
+
+/// Simulate an IR graph and return the serialized `SimulationResult` (the contents
+/// `awenctl run` writes to `results.json`).
+///
+/// # Safety
+/// `ir_ptr` must be valid for reads of `ir_len` bytes; `out_ptr` and `out_len` must be
+/// valid for writes. The returned buffer must be released with `awen_free`.
+#[no_mangle]
+#[allow(clippy::too_many_arguments)]
+pub unsafe extern "C" fn awen_run(
+    ir_ptr: *const u8,
+    ir_len: usize,
+    overlay_ptr: *const u8,
+    overlay_len: usize,
+    seed: u64,
+    has_seed: c_int,
+    out_ptr: *mut *mut u8,
+    out_len: *mut usize,
+) -> c_int {
+    let res = catch_panic(|| {
+        let ir = borrow_str(ir_ptr, ir_len)?;
+        let overlay = parse_overlay(borrow_str(overlay_ptr, overlay_len)?)?;
+        run_json(ir, overlay.as_ref(), opt_seed(seed, has_seed))
+    });
+    emit(res, out_ptr, out_len)
+}
+
+/// Compute gradients for a comma-separated parameter list and return the serialized
+/// `GradientResult` (the contents `awenctl gradient` writes to `gradients.json`). A nonzero
+/// `crn` evaluates both finite-difference perturbations with the same seed.
+///
+/// # Safety
+/// Every `(ptr, len)` pair must be valid for reads; `out_ptr` and `out_len` must be
+/// valid for writes. The returned buffer must be released with `awen_free`.
+#[no_mangle]
+#[allow(clippy::too_many_arguments)]
+pub unsafe extern "C" fn awen_gradient(
+    ir_ptr: *const u8,
+    ir_len: usize,
+    overlay_ptr: *const u8,
+    overlay_len: usize,
+    params_ptr: *const u8,
+    params_len: usize,
+    strategy_ptr: *const u8,
+    strategy_len: usize,
+    seed: u64,
+    has_seed: c_int,
+    samples: u32,
+    crn: c_int,
+    out_ptr: *mut *mut u8,
+    out_len: *mut usize,
+) -> c_int {
+    let res = catch_panic(|| {
+        let ir = borrow_str(ir_ptr, ir_len)?;
+        let overlay = parse_overlay(borrow_str(overlay_ptr, overlay_len)?)?;
+        let params = borrow_str(params_ptr, params_len)?;
+        let strategy = borrow_str(strategy_ptr, strategy_len)?;
+        let opts = gradient_opts(strategy, seed, has_seed, samples, crn);
+        gradient_json(ir, overlay.as_ref(), params, &opts)
+    });
+    emit(res, out_ptr, out_len)
+}
+
+/// Evaluate the nominal cost and gradients in one call and return the serialized
+/// `FusedResult` (`cost` plus the `GradientResult` fields).
+///
+/// # Safety
+/// Same contract as `awen_gradient`.
+#[no_mangle]
+#[allow(clippy::too_many_arguments)]
+pub unsafe extern "C" fn awen_run_and_grad(
+    ir_ptr: *const u8,
+    ir_len: usize,
+    overlay_ptr: *const u8,
+    overlay_len: usize,
+    params_ptr: *const u8,
+    params_len: usize,
+    strategy_ptr: *const u8,
+    strategy_len: usize,
+    seed: u64,
+    has_seed: c_int,
+    samples: u32,
+    crn: c_int,
+    out_ptr: *mut *mut u8,
+    out_len: *mut usize,
+) -> c_int {
+    let res = catch_panic(|| {
+        let ir = borrow_str(ir_ptr, ir_len)?;
+        let overlay = parse_overlay(borrow_str(overlay_ptr, overlay_len)?)?;
+        let params = borrow_str(params_ptr, params_len)?;
+        let strategy = borrow_str(strategy_ptr, strategy_len)?;
+        let opts = gradient_opts(strategy, seed, has_seed, samples, crn);
+        run_and_grad_json(ir, overlay.as_ref(), params, &opts)
+    });
+    emit(res, out_ptr, out_len)
+}
+
+/// Release a buffer returned by one of the `awen_*` entry points.
+///
+/// # Safety
+/// `ptr`/`len` must come from a single prior `awen_*` call and not have been freed.
+#[no_mangle]
+pub unsafe extern "C" fn awen_free(ptr: *mut u8, len: usize) {
+    if !ptr.is_null() {
+        drop(Box::from_raw(std::ptr::slice_from_raw_parts_mut(ptr, len)));
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn call_run(ir: &str, overlay: &str, seed: Option<u64>) -> (c_int, String) {
+        let mut out_ptr: *mut u8 = std::ptr::null_mut();
+        let mut out_len: usize = 0;
+        unsafe {
+            let code = awen_run(
+                ir.as_ptr(),
+                ir.len(),
+                overlay.as_ptr(),
+                overlay.len(),
+                seed.unwrap_or(0),
+                seed.is_some() as c_int,
+                &mut out_ptr,
+                &mut out_len,
+            );
+            let text =
+                String::from_utf8_lossy(std::slice::from_raw_parts(out_ptr, out_len)).into_owned();
+            awen_free(out_ptr, out_len);
+            (code, text)
+        }
+    }
+
+    #[test]
+    fn test_awen_run_returns_simulation_result() {
+        let ir = std::fs::read_to_string("example_ir.json").expect("read example_ir");
+        let (code, text) = call_run(&ir, "", Some(42));
+        assert_eq!(code, 0, "awen_run failed: {}", text);
+        let v: serde_json::Value = serde_json::from_str(&text).expect("parse result");
+        assert_eq!(v["run_seed"], 42);
+        assert_eq!(v["node_results"].as_array().map(|a| a.len()), Some(2));
+    }
+
+    #[test]
+    fn test_awen_run_applies_overlay() {
+        let ir = std::fs::read_to_string("example_ir.json").expect("read example_ir");
+        let mut graph: ir::Graph = serde_json::from_str(&ir).expect("parse example_ir");
+        graph.nodes[1].params.insert("phase".to_string(), 1.25);
+        let expected = serde_json::to_string(&graph).expect("serialize");
+
+        let (_, base) = call_run(&expected, "", Some(7));
+        let (code, text) = call_run(&ir, r#"{"mzi_1:phase": 1.25}"#, Some(7));
+        assert_eq!(code, 0, "awen_run failed: {}", text);
+        assert_eq!(text, base);
+    }
+
+    #[test]
+    fn test_awen_run_reports_parse_errors() {
+        let (code, text) = call_run("{not json", "", None);
+        assert_ne!(code, 0);
+        assert!(!text.is_empty(), "error message should be returned");
+    }
+
+    #[test]
+    fn test_catch_panic_reports_panics_as_errors() {
+        let res = catch_panic(|| panic!("boom"));
+        let msg = res.expect_err("panic should become an error").to_string();
+        assert!(msg.contains("boom"), "unexpected message: {}", msg);
+
+        let mut out_ptr: *mut u8 = std::ptr::null_mut();
+        let mut out_len: usize = 0;
+        let code = unsafe { emit(catch_panic(|| panic!("boom")), &mut out_ptr, &mut out_len) };
+        assert_ne!(code, 0);
+        unsafe { awen_free(out_ptr, out_len) };
+    }
+
+    #[test]
+    fn test_awen_gradient_matches_provider() {
+        let ir = std::fs::read_to_string("example_ir.json").expect("read example_ir");
+        let params = "mzi_0:phase,mzi_1:phase";
+        let strategy = "finite_difference";
+        let mut out_ptr: *mut u8 = std::ptr::null_mut();
+        let mut out_len: usize = 0;
+        let text = unsafe {
+            let code = awen_gradient(
+                ir.as_ptr(),
+                ir.len(),
+                std::ptr::null(),
+                0,
+                params.as_ptr(),
+                params.len(),
+                strategy.as_ptr(),
+                strategy.len(),
+                42,
+                1,
+                1,
+                0,
+                &mut out_ptr,
+                &mut out_len,
+            );
+            assert_eq!(code, 0);
+            let text =
+                String::from_utf8_lossy(std::slice::from_raw_parts(out_ptr, out_len)).into_owned();
+            awen_free(out_ptr, out_len);
+            text
+        };
+        let res: gradients::GradientResult = serde_json::from_str(&text).expect("parse");
+        assert!(res.gradients.contains_key("mzi_0:phase"));
+        assert!(res.gradients.contains_key("mzi_1:phase"));
+    }
+}
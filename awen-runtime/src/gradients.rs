@@ -14,7 +14,7 @@ use crate::plugins::run_reference_simulator;
 use std::f64::consts::PI;
 
 /// Describes noise model parameters for gradient estimation.
-#[derive(Serialize, Deserialize, Debug, Clone)]
+#[derive(Serialize, Deserialize, Debug, Clone, Default)]
 pub struct NoiseModel {
     pub shot_noise_std: Option<f64>,
     pub thermal_noise_std: Option<f64>,
@@ -29,6 +29,10 @@ pub struct GradientOptions {
     pub strategy: String, // "adjoint", "parameter_shift", "finite_difference", "score_function"
     pub seed: Option<u64>,
     pub samples: Option<u32>,
+    /// Common random numbers: evaluate the +eps and -eps perturbations of each sample with the
+    /// same seed so simulator noise cancels in the central difference (finite-difference only).
+    #[serde(default)]
+    pub crn: bool,
 }
 
 /// Result of gradient computation
@@ -39,6 +43,14 @@ pub struct GradientResult {
     pub provenance: HashMap<String, String>,
 }
 
+/// Forward cost and gradients computed in one call (`awenctl fused`, `awen_run_and_grad`).
+#[derive(Serialize, Deserialize, Debug, Clone)]
+pub struct FusedResult {
+    pub cost: f64,
+    #[serde(flatten)]
+    pub gradient: GradientResult,
+}
+
 /// Trait that gradient-capable backends must implement. Runtime offers a pluggable dispatch to providers.
 pub trait GradientProvider: Send + Sync + 'static {
     /// Compute gradients for the given IR snapshot and parameter list.
@@ -95,6 +107,63 @@ pub fn register_defaults_to_global() {
     register_default_providers(&GLOBAL_GRADIENT_REGISTRY);
 }
 
+/// Resolve a CLI/FFI strategy name to a registered provider.
+/// - "adjoint" -> reference adjoint provider
+/// - "finite_difference" (or "finite-difference", "fd") -> reference finite-difference provider
+/// - anything else ("auto") -> adjoint if registered, else finite-difference
+pub fn select_provider(strategy: &str) -> Result<Arc<dyn GradientProvider>> {
+    register_defaults_to_global();
+    match strategy {
+        s if s.eq_ignore_ascii_case("adjoint") => GLOBAL_GRADIENT_REGISTRY
+            .get("reference-adjoint")
+            .ok_or_else(|| anyhow::anyhow!("adjoint provider not available")),
+        s if s.eq_ignore_ascii_case("finite_difference")
+            || s.eq_ignore_ascii_case("finite-difference")
+            || s.eq_ignore_ascii_case("fd") =>
+        {
+            GLOBAL_GRADIENT_REGISTRY
+                .get("reference-fd")
+                .ok_or_else(|| anyhow::anyhow!("fd provider not available"))
+        }
+        _ => GLOBAL_GRADIENT_REGISTRY
+            .get("reference-adjoint")
+            .or_else(|| GLOBAL_GRADIENT_REGISTRY.get("reference-fd"))
+            .ok_or_else(|| anyhow::anyhow!("no gradient providers registered")),
+    }
+}
+
+/// Scalar cost shared by the reference providers and the Python autograd bridge: output power
+/// (real^2 + imag^2) of the last node in the reference simulator.
+pub fn reference_cost(graph: &ir::Graph, seed: Option<u64>) -> Result<f64> {
+    Ok(run_reference_simulator(graph, seed)?.scalar_cost())
+}
+
+/// Evaluate the nominal cost and the gradients of `params` in a single call, so callers pay
+/// process startup and IR loading once per optimizer step. The nominal run uses the same
+/// default seed as `Engine::run_graph`.
+pub fn run_and_grad(
+    provider: &dyn GradientProvider,
+    ir_json: &str,
+    params: &[String],
+    noise: &NoiseModel,
+    opts: &GradientOptions,
+) -> Result<FusedResult> {
+    let graph: ir::Graph = serde_json::from_str(ir_json)?;
+    ir::validate_graph(&graph).map_err(|e| anyhow::anyhow!(e))?;
+    let cost = reference_cost(&graph, Some(opts.seed.unwrap_or(42)))?;
+    let gradient = provider.compute_gradients(ir_json, params, noise, opts)?;
+    Ok(FusedResult { cost, gradient })
+}
+
+/// Split a comma-separated parameter list ("mzi_0:phase,mzi_1:phase") into names.
+pub fn parse_param_list(params_csv: &str) -> Vec<String> {
+    params_csv
+        .split(',')
+        .map(|s| s.trim().to_string())
+        .filter(|s| !s.is_empty())
+        .collect()
+}
+
 /// Reference finite-difference GradientProvider for conformance and tests. Computes gradients of a simple scalar
 /// cost defined as the output power of the last node in the reference simulator.
 pub struct ReferenceGradientProvider {}
@@ -105,14 +174,7 @@ impl ReferenceGradientProvider {
     }
 
     fn evaluate_cost(&self, graph: &ir::Graph, seed: Option<u64>) -> Result<f64> {
-        let sim = run_reference_simulator(graph, seed)?;
-        // define cost: sum of output power of last node result (real^2 + imag^2)
-        if let Some(last) = sim.node_results.last() {
-            let (re, im) = last.out_amplitude;
-            Ok(re * re + im * im)
-        } else {
-            Ok(0.0)
-        }
+        reference_cost(graph, seed)
     }
 }
 
@@ -181,14 +243,21 @@ impl GradientProvider for ReferenceGradientProvider {
             let mut grads_acc = 0.0_f64;
             let mut vals = Vec::new();
             for s in 0..samples {
-                let seed1 = seed_base
-                    .wrapping_add(s as u64)
-                    .wrapping_mul(2)
-                    .wrapping_add(1);
-                let seed2 = seed_base
-                    .wrapping_add(s as u64)
-                    .wrapping_mul(2)
-                    .wrapping_add(2);
+                let (seed1, seed2) = if opts.crn {
+                    let seed = seed_base.wrapping_add(s as u64);
+                    (seed, seed)
+                } else {
+                    (
+                        seed_base
+                            .wrapping_add(s as u64)
+                            .wrapping_mul(2)
+                            .wrapping_add(1),
+                        seed_base
+                            .wrapping_add(s as u64)
+                            .wrapping_mul(2)
+                            .wrapping_add(2),
+                    )
+                };
 
                 graph.nodes[node_idx].params.insert(key.clone(), orig + eps);
                 let f_plus = self.evaluate_cost(&graph, Some(seed1))?;
@@ -479,6 +548,7 @@ mod tests {
             strategy: "finite_difference".to_string(),
             seed: Some(42),
             samples: Some(1),
+            crn: false,
         };
         let res = provider
             .compute_gradients(&ir, &params, &noise, &opts)
@@ -486,6 +556,60 @@ mod tests {
         assert!(res.gradients.contains_key("mzi_0:phase"));
     }
 
+    #[test]
+    fn test_fd_crn_uses_same_seed_for_both_perturbations() {
+        let ir = fs::read_to_string("example_ir.json").expect("read example_ir");
+        let mut graph: ir::Graph = serde_json::from_str(&ir).expect("parse example_ir");
+        let params = vec!["mzi_0:phase".to_string()];
+        let opts = GradientOptions {
+            strategy: "finite_difference".to_string(),
+            seed: Some(7),
+            samples: Some(1),
+            crn: true,
+        };
+        let res = ReferenceGradientProvider::new()
+            .compute_gradients(&ir, &params, &NoiseModel::default(), &opts)
+            .expect("compute gradients");
+
+        let eps = 1e-6_f64;
+        let idx = graph.nodes.iter().position(|n| n.id == "mzi_0").unwrap();
+        let orig = *graph.nodes[idx].params.get("phase").unwrap_or(&0.0);
+        graph.nodes[idx]
+            .params
+            .insert("phase".to_string(), orig + eps);
+        let f_plus = reference_cost(&graph, Some(7)).expect("cost");
+        graph.nodes[idx]
+            .params
+            .insert("phase".to_string(), orig - eps);
+        let f_minus = reference_cost(&graph, Some(7)).expect("cost");
+        assert_eq!(
+            res.gradients["mzi_0:phase"],
+            (f_plus - f_minus) / (2.0 * eps)
+        );
+    }
+
+    #[test]
+    fn test_run_and_grad_matches_separate_calls() {
+        let ir = fs::read_to_string("example_ir.json").expect("read example_ir");
+        let graph: ir::Graph = serde_json::from_str(&ir).expect("parse example_ir");
+        let params = vec!["mzi_0:phase".to_string(), "mzi_1:phase".to_string()];
+        let opts = GradientOptions {
+            strategy: "finite_difference".to_string(),
+            seed: Some(42),
+            samples: Some(1),
+            crn: false,
+        };
+        let provider = ReferenceGradientProvider::new();
+        let fused = run_and_grad(&provider, &ir, &params, &NoiseModel::default(), &opts)
+            .expect("run_and_grad");
+        let grads = provider
+            .compute_gradients(&ir, &params, &NoiseModel::default(), &opts)
+            .expect("compute gradients");
+        let cost = reference_cost(&graph, Some(42)).expect("cost");
+        assert_eq!(fused.cost, cost);
+        assert_eq!(fused.gradient.gradients, grads.gradients);
+    }
+
     #[test]
     fn test_adjoint_vs_fd_conformance() {
         // Compare analytic adjoint against finite-difference for MZI phase parameters
@@ -502,11 +626,13 @@ mod tests {
             strategy: "finite_difference".to_string(),
             seed: Some(12345),
             samples: Some(3),
+            crn: false,
         };
         let adj_opts = GradientOptions {
             strategy: "adjoint".to_string(),
             seed: Some(12345),
             samples: Some(1),
+            crn: false,
         };
 
         let fd = ReferenceGradientProvider::new();
@@ -52,6 +52,84 @@ pub fn load_from_json(path: &str) -> Result<Graph, String> {
     serde_json::from_str::<Graph>(&data).map_err(|e| format!("parse error: {}", e))
 }
 
+/// Parameter values applied on top of a loaded IR (`awenctl --params-overlay`), so callers that
+/// only change a few parameters per call can send a small map instead of rewriting the IR.
+/// Keys are either "node_id:key" (sets `key` on the node(s) with that id) or a bare parameter
+/// name (sets it on the first node that has it, else records it in `metadata`). When a bare name
+/// and a "node_id:key" entry target the same parameter, the "node_id:key" value wins.
+pub type ParamOverlay = HashMap<String, f64>;
+
+pub fn apply_overlay(graph: &mut Graph, overlay: &ParamOverlay) {
+    // Resolve every name against the graph as loaded, from one pass over the nodes, instead of
+    // scanning all nodes per overlay entry. This also makes bare-name lookups independent of
+    // the (unordered) order in which entries are applied. Bare-name updates are applied before
+    // "node_id:key" ones, so a value targeted at a specific node always wins; that is the only
+    // way two entries can hit the same (node, key), so the result never depends on map order.
+    let mut by_id: HashMap<&str, Vec<usize>> = HashMap::new();
+    let mut by_key: HashMap<&str, usize> = HashMap::new();
+    for (i, node) in graph.nodes.iter().enumerate() {
+        by_id.entry(node.id.as_str()).or_default().push(i);
+        for key in node.params.keys() {
+            by_key.entry(key.as_str()).or_insert(i);
+        }
+    }
+
+    let mut by_name: Vec<(usize, &str, f64)> = Vec::new();
+    let mut updates: Vec<(usize, &str, f64)> = Vec::with_capacity(overlay.len());
+    let mut unresolved: Vec<(&str, f64)> = Vec::new();
+    for (name, value) in overlay {
+        if let Some((node_id, key)) = name.split_once(':') {
+            for &i in by_id.get(node_id).into_iter().flatten() {
+                updates.push((i, key, *value));
+            }
+        } else if let Some(&i) = by_key.get(name.as_str()) {
+            by_name.push((i, name.as_str(), *value));
+        } else {
+            unresolved.push((name.as_str(), *value));
+        }
+    }
+
+    for (i, key, value) in by_name.into_iter().chain(updates) {
+        graph.nodes[i].params.insert(key.to_string(), value);
+    }
+    for (name, value) in unresolved {
+        graph.metadata.insert(name.to_string(), value.to_string());
+    }
+}
+
+pub fn load_overlay(path: &str) -> Result<ParamOverlay, String> {
+    let data = std::fs::read_to_string(path).map_err(|e| format!("read error: {}", e))?;
+    serde_json::from_str::<ParamOverlay>(&data).map_err(|e| format!("parse error: {}", e))
+}
+
+/// Load an IR file and apply an optional overlay file on top of it.
+pub fn load_with_overlay(path: &str, overlay_path: Option<&str>) -> Result<Graph, String> {
+    let mut graph = load_from_json(path)?;
+    if let Some(overlay_path) = overlay_path {
+        apply_overlay(&mut graph, &load_overlay(overlay_path)?);
+    }
+    Ok(graph)
+}
+
+/// Apply an optional overlay to a serialized IR, returning the JSON the gradient providers
+/// consume. Without an overlay the input is passed through untouched.
+pub fn overlay_json<'a>(
+    ir_json: &'a str,
+    overlay: Option<&ParamOverlay>,
+) -> Result<std::borrow::Cow<'a, str>, String> {
+    match overlay {
+        None => Ok(std::borrow::Cow::Borrowed(ir_json)),
+        Some(overlay) => {
+            let mut graph: Graph =
+                serde_json::from_str(ir_json).map_err(|e| format!("parse error: {}", e))?;
+            apply_overlay(&mut graph, overlay);
+            serde_json::to_string(&graph)
+                .map(std::borrow::Cow::Owned)
+                .map_err(|e| format!("serialize error: {}", e))
+        }
+    }
+}
+
 /// Validate IR: check that conditional branches reference existing nodes
 pub fn validate_graph(graph: &Graph) -> Result<(), String> {
     let node_ids: std::collections::HashSet<&str> =
@@ -84,3 +162,35 @@ pub fn validate_graph(graph: &Graph) -> Result<(), String> {
 
     Ok(())
 }
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn test_apply_overlay_by_node_and_by_name() {
+        let mut graph = load_from_json("example_ir.json").expect("load example_ir");
+        let mut overlay = ParamOverlay::new();
+        overlay.insert("mzi_1:phase".to_string(), 0.7);
+        overlay.insert("mzi_0:loss".to_string(), 0.05);
+        overlay.insert("phase".to_string(), 0.3);
+        overlay.insert("gain".to_string(), 2.0);
+        apply_overlay(&mut graph, &overlay);
+
+        assert_eq!(graph.nodes[0].params["phase"], 0.3);
+        assert_eq!(graph.nodes[0].params["loss"], 0.05);
+        assert_eq!(graph.nodes[1].params["phase"], 0.7);
+        assert_eq!(graph.metadata["gain"], "2");
+
+        // A bare name and "node_id:key" hitting the same parameter: the node-specific value
+        // wins whatever order the map yields (each new map gets a fresh hash seed).
+        for _ in 0..16 {
+            let mut graph = load_from_json("example_ir.json").expect("load example_ir");
+            let mut overlay = ParamOverlay::new();
+            overlay.insert("phase".to_string(), 0.3);
+            overlay.insert("mzi_0:phase".to_string(), 0.9);
+            apply_overlay(&mut graph, &overlay);
+            assert_eq!(graph.nodes[0].params["phase"], 0.9);
+        }
+    }
+}
@@ -4,6 +4,7 @@ pub mod chokepoint;
 pub mod control;
 pub mod engine;
 pub mod engine_v2;
+pub mod ffi;
 pub mod gradients;
 pub mod hal;
 pub mod hal_v0;
@@ -12,6 +13,7 @@ pub mod observability;
 pub mod plugins;
 pub mod quantum;
 pub mod scheduler;
+pub mod serve;
 pub mod state;
 pub mod storage;
 
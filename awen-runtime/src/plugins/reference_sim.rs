@@ -26,6 +26,20 @@ pub struct SimulationResult {
     pub node_results: Vec<NodeResult>,
 }
 
+impl SimulationResult {
+    /// Scalar cost used by the gradient providers and the Python autograd bridge: output power
+    /// (real^2 + imag^2) of the last node, or 0.0 for an empty result.
+    pub fn scalar_cost(&self) -> f64 {
+        self.node_results
+            .last()
+            .map(|last| {
+                let (re, im) = last.out_amplitude;
+                re * re + im * im
+            })
+            .unwrap_or(0.0)
+    }
+}
+
 /// Reference simulator: supports node types: MZI, RING, DETECTOR, LOSS, DELAY.
 /// - MZI: applies a phase shift parameter `phase` and optional `loss` param
 /// - RING: applies frequency-dependent transfer approximation via `coupling` and `loss`
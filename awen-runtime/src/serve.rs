@@ -0,0 +1,208 @@
+//! Request server behind `awenctl serve <socket>`.
+//!
+//! Keeps one runtime process alive and answers requests over a UNIX-domain stream socket so
+//! clients (e.g. `awen_py.daemon`) pay a send/recv pair per call instead of a process spawn.
+//!
+//! Framing: every message is a 4-byte big-endian length followed by the payload.
+//! - request payload: JSON object `{"op": "run" | "gradient" | "run_and_grad", "ir": "<IR JSON>",
+//!   "overlay": {"node_id:key": value}, "params": [...], "strategy": "...", "seed": 42,
+//!   "samples": 1, "crn": false}`
+//! - reply payload: one status byte (0 ok, 1 error) followed by the same JSON document the
+//!   matching `awen_*` FFI entry point returns, or the UTF-8 error message.
+
+use crate::ffi;
+use crate::gradients::GradientOptions;
+use anyhow::Result;
+use serde::Deserialize;
+use std::io::{Read, Write};
+
+/// Upper bound on a single request frame; guards against reading garbage lengths.
+const MAX_FRAME_LEN: usize = 256 * 1024 * 1024;
+
+#[derive(Deserialize)]
+struct Request {
+    op: String,
+    ir: String,
+    #[serde(default)]
+    overlay: Option<crate::ir::ParamOverlay>,
+    #[serde(default)]
+    params: Vec<String>,
+    #[serde(default = "default_strategy")]
+    strategy: String,
+    #[serde(default)]
+    seed: Option<u64>,
+    #[serde(default = "default_samples")]
+    samples: u32,
+    #[serde(default)]
+    crn: bool,
+}
+
+fn default_strategy() -> String {
+    "finite_difference".to_string()
+}
+
+fn default_samples() -> u32 {
+    1
+}
+
+fn dispatch(payload: &[u8]) -> Result<Vec<u8>> {
+    let req: Request = serde_json::from_slice(payload)?;
+    let params_csv = req.params.join(",");
+    let overlay = req.overlay.as_ref();
+    let opts = GradientOptions {
+        strategy: req.strategy,
+        seed: req.seed,
+        samples: Some(req.samples),
+        crn: req.crn,
+    };
+    match req.op.as_str() {
+        "run" => ffi::run_json(&req.ir, overlay, req.seed),
+        "gradient" => ffi::gradient_json(&req.ir, overlay, &params_csv, &opts),
+        "run_and_grad" => ffi::run_and_grad_json(&req.ir, overlay, &params_csv, &opts),
+        other => Err(anyhow::anyhow!("unknown op: {}", other)),
+    }
+}
+
+/// Read one length-prefixed frame; returns `None` on a clean EOF between frames.
+fn read_frame<R: Read>(stream: &mut R) -> Result<Option<Vec<u8>>> {
+    let mut len_buf = [0u8; 4];
+    match stream.read_exact(&mut len_buf) {
+        Ok(()) => {}
+        Err(e) if e.kind() == std::io::ErrorKind::UnexpectedEof => return Ok(None),
+        Err(e) => return Err(e.into()),
+    }
+    let len = u32::from_be_bytes(len_buf) as usize;
+    if len > MAX_FRAME_LEN {
+        return Err(anyhow::anyhow!("frame of {} bytes exceeds limit", len));
+    }
+    let mut payload = vec![0u8; len];
+    stream.read_exact(&mut payload)?;
+    Ok(Some(payload))
+}
+
+fn write_reply<W: Write>(stream: &mut W, res: Result<Vec<u8>>) -> Result<()> {
+    let (status, body) = match res {
+        Ok(body) => (0u8, body),
+        Err(e) => (1u8, e.to_string().into_bytes()),
+    };
+    let len = (body.len() + 1) as u32;
+    let mut frame = Vec::with_capacity(body.len() + 5);
+    frame.extend_from_slice(&len.to_be_bytes());
+    frame.push(status);
+    frame.extend_from_slice(&body);
+    stream.write_all(&frame)?;
+    Ok(())
+}
+
+/// Answer requests on one connection until the client hangs up.
+fn handle_connection<S: Read + Write>(mut stream: S) -> Result<()> {
+    while let Some(payload) = read_frame(&mut stream)? {
+        write_reply(&mut stream, dispatch(&payload))?;
+    }
+    Ok(())
+}
+
+/// Bind `socket_path` (replacing a stale socket file) and serve connections until killed.
+/// Each connection is handled on its own thread.
+#[cfg(unix)]
+pub fn serve(socket_path: &std::path::Path) -> Result<()> {
+    use std::os::unix::net::UnixListener;
+
+    if socket_path.exists() {
+        std::fs::remove_file(socket_path)?;
+    }
+    let listener = UnixListener::bind(socket_path)?;
+    for stream in listener.incoming() {
+        let stream = stream?;
+        std::thread::spawn(move || {
+            if let Err(e) = handle_connection(stream) {
+                log::warn!("awenctl serve: connection closed with error: {}", e);
+            }
+        });
+    }
+    Ok(())
+}
+
+#[cfg(not(unix))]
+pub fn serve(_socket_path: &std::path::Path) -> Result<()> {
+    Err(anyhow::anyhow!(
+        "awenctl serve requires UNIX-domain sockets"
+    ))
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use std::io::Cursor;
+
+    fn frame(payload: &[u8]) -> Vec<u8> {
+        let mut out = (payload.len() as u32).to_be_bytes().to_vec();
+        out.extend_from_slice(payload);
+        out
+    }
+
+    fn request(op: &str) -> Vec<u8> {
+        let ir = std::fs::read_to_string("example_ir.json").expect("read example_ir");
+        serde_json::to_vec(&serde_json::json!({
+            "op": op,
+            "ir": ir,
+            "params": ["mzi_0:phase"],
+            "seed": 42,
+        }))
+        .expect("encode request")
+    }
+
+    fn replies(input: Vec<u8>) -> Vec<(u8, serde_json::Value)> {
+        struct Duplex {
+            input: Cursor<Vec<u8>>,
+            output: Vec<u8>,
+        }
+        impl Read for Duplex {
+            fn read(&mut self, buf: &mut [u8]) -> std::io::Result<usize> {
+                self.input.read(buf)
+            }
+        }
+        impl Write for Duplex {
+            fn write(&mut self, buf: &[u8]) -> std::io::Result<usize> {
+                self.output.write(buf)
+            }
+            fn flush(&mut self) -> std::io::Result<()> {
+                Ok(())
+            }
+        }
+
+        let mut duplex = Duplex {
+            input: Cursor::new(input),
+            output: Vec::new(),
+        };
+        handle_connection(&mut duplex).expect("handle connection");
+
+        let mut out = Cursor::new(duplex.output);
+        let mut replies = Vec::new();
+        while let Some(body) = read_frame(&mut out).expect("read reply") {
+            let value = if body[0] == 0 {
+                serde_json::from_slice(&body[1..]).expect("parse reply")
+            } else {
+                serde_json::Value::String(String::from_utf8_lossy(&body[1..]).into_owned())
+            };
+            replies.push((body[0], value));
+        }
+        replies
+    }
+
+    #[test]
+    fn test_serves_multiple_requests_per_connection() {
+        let mut input = frame(&request("run"));
+        input.extend(frame(&request("run_and_grad")));
+        input.extend(frame(&request("bogus")));
+
+        let replies = replies(input);
+        assert_eq!(replies.len(), 3);
+        assert_eq!(replies[0].0, 0);
+        assert_eq!(replies[0].1["run_seed"], 42);
+        assert_eq!(replies[1].0, 0);
+        assert!(replies[1].1["cost"].is_number());
+        assert!(replies[1].1["gradients"]["mzi_0:phase"].is_number());
+        assert_eq!(replies[2].0, 1, "unknown op should be reported as an error");
+    }
+}